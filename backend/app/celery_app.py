@@ -10,7 +10,7 @@ celery_app = Celery(
     "app",
     backend=result_backend,
     broker=broker_url,
-    include=["app.tasks.periodic", "app.tasks.user_tasks"],
+    include=["app.tasks.periodic", "app.tasks.user_tasks", "app.tasks.admin_tasks"],
 )
 
 # Configure with defaults - will be updated when Flask app is available
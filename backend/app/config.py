@@ -18,6 +18,9 @@ class Config:
     FILE_UPLOAD_FOLDER = "static/uploads/files"
     IMAGE_UPLOAD_FOLDER = "static/uploads/images"
     EXPORT_FOLDER = "static/exports"
+    # Admin analytics exports hold every student's data, so they are kept out
+    # of the static folder and only served by an admin route
+    ANALYTICS_EXPORT_FOLDER = "exports/analytics"
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     ALLOWED_FILE_EXTENSIONS = ["pdf"]
     ALLOWED_IMAGE_EXTENSIONS = ["png", "jpg", "jpeg", "gif"]
@@ -37,6 +40,17 @@ class Config:
         "1",
         "yes",
     ]
+    # Messages sent over one SMTP connection by send_email_batch, and how
+    # often a dropped connection is reopened before the rest of a batch fails
+    MAIL_BATCH_SIZE = int(os.environ.get("MAIL_BATCH_SIZE") or 100)
+    MAIL_MAX_RECONNECTS = int(os.environ.get("MAIL_MAX_RECONNECTS") or 3)
+    # Users per subtask of the reminder and report mailings
+    MAIL_CHUNK_SIZE = int(os.environ.get("MAIL_CHUNK_SIZE") or 500)
+    # Seconds after which an unfinished delivery claim of a crashed task
+    # may be taken over by another run
+    MAIL_CLAIM_TIMEOUT_SECONDS = int(
+        os.environ.get("MAIL_CLAIM_TIMEOUT_SECONDS") or 30 * 60
+    )
 
     # Redis Configuration - localhost defaults for development
     REDIS_URL = os.environ.get("REDIS_URL") or "redis://localhost:6379/0"
@@ -47,6 +61,24 @@ class Config:
     CACHE_REDIS_DB = int(os.environ.get("CACHE_REDIS_DB") or 0)
     CACHE_DEFAULT_TIMEOUT = int(os.environ.get("CACHE_DEFAULT_TIMEOUT") or 300)
 
+    # Buffer in-progress answers in Redis and flush them to the database on
+    # submit or on the periodic checkpoint instead of committing every click
+    ANSWER_WRITE_BEHIND = os.environ.get("ANSWER_WRITE_BEHIND", "False").lower() in [
+        "true",
+        "1",
+        "yes",
+    ]
+    ANSWER_BUFFER_TTL = int(os.environ.get("ANSWER_BUFFER_TTL") or 60 * 60 * 48)
+
+    # Quizzes starting within this many minutes get their caches pre-warmed
+    QUIZ_PREWARM_LOOKAHEAD_MINUTES = int(
+        os.environ.get("QUIZ_PREWARM_LOOKAHEAD_MINUTES") or 10
+    )
+
+    # "redis" serves leaderboards from sorted sets maintained on submit,
+    # "sql" ranks them in the database with window functions
+    LEADERBOARD_BACKEND = os.environ.get("LEADERBOARD_BACKEND") or "redis"
+
     # Celery Configuration - localhost defaults for development
     CELERY_BROKER_URL = (
         os.environ.get("CELERY_BROKER_URL") or "redis://localhost:6379/0"
@@ -67,6 +99,14 @@ class Config:
             "schedule": 60.0 * 60.0 * 24.0,  # 24 hours
             # "schedule": 60.0,  # 1 minute for testing
         },
+        "answer-buffer-checkpoint": {
+            "task": "app.tasks.periodic.checkpoint_answer_buffers",
+            "schedule": 60.0,  # 1 minute
+        },
+        "quiz-cache-prewarm": {
+            "task": "app.tasks.periodic.prewarm_quiz_caches",
+            "schedule": 60.0 * 5.0,  # 5 minutes
+        },
         "monthly-reports": {
             "task": "app.tasks.periodic.generate_monthly_reports",
             "schedule": crontab(
@@ -84,8 +124,14 @@ backend_path = os.path.dirname(base_path)  # Go up one level from app to backend
 file_upload_folder = os.path.join(backend_path, Config.FILE_UPLOAD_FOLDER)
 image_upload_folder = os.path.join(backend_path, Config.IMAGE_UPLOAD_FOLDER)
 export_folder = os.path.join(backend_path, Config.EXPORT_FOLDER)
+analytics_export_folder = os.path.join(backend_path, Config.ANALYTICS_EXPORT_FOLDER)
 
-for folder in [file_upload_folder, image_upload_folder, export_folder]:
+for folder in [
+    file_upload_folder,
+    image_upload_folder,
+    export_folder,
+    analytics_export_folder,
+]:
     if not os.path.exists(folder):
         os.makedirs(folder)
         print(f"Created {folder}")
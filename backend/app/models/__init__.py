@@ -1,20 +1,26 @@
 from .user import User
 from .chapter import Chapter
+from .email_delivery import EmailDelivery
 from .option import Option
 from .question import Question
 from .quiz_attempt import QuizAttempt
 from .quiz import Quiz
+from .quiz_stats import QuizStats
 from .subject import Subject
 from .user_response import UserResponse
+from .user_stats import UserStats
 
 
 __all__ = [
     "User",
     "Chapter",
+    "EmailDelivery",
     "Option",
     "Question",
     "QuizAttempt",
     "Quiz",
+    "QuizStats",
     "Subject",
     "UserResponse",
+    "UserStats",
 ]
@@ -0,0 +1,39 @@
+from app import db
+from datetime import datetime, timezone
+
+
+class EmailDelivery(db.Model):
+    """
+    Ledger of the periodic emails of a user, one row per kind and period
+    (e.g. "daily_reminder", "2026-03-14"). A run claims the rows of the users
+    it is about to mail and marks them sent afterwards, so retries and
+    overlapping runs skip users that already got their email.
+    """
+
+    __tablename__ = "email_delivery"
+
+    STATUSES = ("pending", "sent", "failed")
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    kind = db.Column(db.String(30), nullable=False)
+    period = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(10), nullable=False, default="pending")
+    # Set while a task is sending the email; claims older than
+    # MAIL_CLAIM_TIMEOUT_SECONDS belong to a crashed task and can be taken over
+    claim_token = db.Column(db.String(36))
+    claimed_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    sent_at = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "user_id", "kind", "period", name="unique_user_email_period"
+        ),
+        # Sent users of a run, skipped by the dispatcher
+        db.Index("ix_email_delivery_run", "kind", "period", "status"),
+    )
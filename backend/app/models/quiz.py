@@ -7,8 +7,10 @@ import os
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False, unique=False)
-    chapter_id = db.Column(db.Integer, db.ForeignKey("chapter.id"), nullable=False)
-    quiz_date = db.Column(db.DateTime, nullable=False)
+    chapter_id = db.Column(
+        db.Integer, db.ForeignKey("chapter.id"), nullable=False, index=True
+    )
+    quiz_date = db.Column(db.DateTime, nullable=False, index=True)
     time_duration = db.Column(db.Integer, nullable=False)
     remarks = db.Column(db.Text)
 
@@ -16,8 +16,20 @@ class QuizAttempt(db.Model):
     score = db.Column(db.Float, nullable=False, default=0)
     remarks = db.Column(db.Text)
 
+    # Summary written once when the attempt is submitted (NULL while in progress)
+    total_questions = db.Column(db.Integer)
+    max_marks = db.Column(db.Float)
+    attempted_count = db.Column(db.Integer)
+    correct_count = db.Column(db.Integer)
+    wrong_count = db.Column(db.Integer)
+    duration_seconds = db.Column(db.Float)
+
     responses = db.relationship("UserResponse", backref="attempt", lazy=True)
 
     __table_args__ = (
         db.UniqueConstraint("user_id", "quiz_id", name="unique_user_quiz_attempt"),
+        # Leaderboard order of the completed attempts of a quiz
+        db.Index(
+            "ix_quiz_attempt_leaderboard", "quiz_id", "in_progress", "score", "end_time"
+        ),
     )
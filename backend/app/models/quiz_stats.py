@@ -0,0 +1,29 @@
+from app import db
+from datetime import datetime, timezone
+
+
+class QuizStats(db.Model):
+    """
+    Running totals of the completed attempts of a quiz, updated when an
+    attempt is submitted so summaries never have to scan quiz_attempt.
+    """
+
+    __tablename__ = "quiz_stats"
+
+    quiz_id = db.Column(db.Integer, db.ForeignKey("quiz.id"), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_min = db.Column(db.Float)
+    score_max = db.Column(db.Float)
+    # Attempts with a recorded duration and the sum of their durations
+    duration_count = db.Column(db.Integer, nullable=False, default=0)
+    duration_sum = db.Column(db.Float, nullable=False, default=0)
+    # Highest score, earliest submit first on ties
+    top_user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
+    top_score = db.Column(db.Float)
+    top_end_time = db.Column(db.DateTime)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    top_user = db.relationship("User", lazy=True)
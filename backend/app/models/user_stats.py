@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime, timezone
+
+
+class UserStats(db.Model):
+    """
+    Running totals of the completed attempts of a user per subject, chapter
+    and month of submission, updated when an attempt is submitted so the
+    performance summary never has to read the attempt history.
+    """
+
+    __tablename__ = "user_stats"
+
+    SCOPES = ("subject", "chapter", "month")
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    scope = db.Column(db.String(10), primary_key=True)
+    # Subject or chapter id, or "YYYY-MM" (UTC) for months
+    scope_key = db.Column(db.String(20), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    max_marks_sum = db.Column(db.Float, nullable=False, default=0)
+    best_score = db.Column(db.Float)
+    # Best score as a percentage of the max marks of its quiz
+    best_percentage = db.Column(db.Float)
+    total_questions = db.Column(db.Integer, nullable=False, default=0)
+    attempted_count = db.Column(db.Integer, nullable=False, default=0)
+    correct_count = db.Column(db.Integer, nullable=False, default=0)
+    duration_sum = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
@@ -1,8 +1,8 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, send_from_directory
 from flask_restful import Api, Resource
 from flask_jwt_extended import jwt_required, get_jwt
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Importing service functions
 from app.services.catalog import (
@@ -12,7 +12,6 @@ from app.services.catalog import (
     get_chapter_by_id,
     get_quizzes_by_chapter,
     get_quiz_by_id,
-    get_all_quizzes,
     get_questions_by_quiz,
     get_question_by_id,
 )
@@ -39,7 +38,18 @@ from app.services.admin.user_admin_service import (
     block_user,
     unblock_user,
 )
-from app.services.admin.quiz_admin_service import get_all_quiz_summary
+from app.services.admin.quiz_admin_service import (
+    find_quizzes,
+    build_quiz_summaries,
+)
+from app.utils.pagination import parse_limit
+from app.services.admin.item_analysis_service import (
+    get_cached_item_analysis,
+    claim_item_analysis,
+    release_item_analysis_claim,
+)
+from app.services.admin.analytics_export_service import EXPORT_FORMATS, export_path
+from app.tasks.admin_tasks import compute_item_analysis, export_analytics_data
 
 admin_bp = Blueprint("admin_api", __name__)
 admin_api = Api(admin_bp)
@@ -57,6 +67,63 @@ def admin_required(fn):
     return wrapper
 
 
+def _int_arg(name):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+
+def _date_arg(name):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or datetime")
+
+
+def _quiz_query_args():
+    """
+    Filters, sort and page of the quiz listings from the query string:
+    subject_id, chapter_id, date_from, date_to (a bare date includes the whole
+    day), has_attempts, sort, order, limit and cursor.
+    """
+    date_to = _date_arg("date_to")
+    if date_to is not None and len(request.args["date_to"]) == 10:
+        date_to += timedelta(days=1)
+    elif date_to is not None:
+        date_to += timedelta(microseconds=1)
+    has_attempts = request.args.get("has_attempts")
+    if has_attempts not in (None, ""):
+        has_attempts = has_attempts.lower() in ["true", "1", "yes"]
+    else:
+        has_attempts = None
+
+    limit = request.args.get("limit")
+    return {
+        "filters": {
+            "subject_id": _int_arg("subject_id"),
+            "chapter_id": _int_arg("chapter_id"),
+            "date_from": _date_arg("date_from"),
+            "date_until": date_to,
+            "has_attempts": has_attempts,
+        },
+        "sort": request.args.get("sort") or None,
+        "order": request.args.get("order") or "desc",
+        "limit": None if limit is None else parse_limit(limit),
+        "cursor": request.args.get("cursor") or None,
+    }
+
+
+def _paginated():
+    return "limit" in request.args or "cursor" in request.args
+
+
 # ------------------ Subject Endpoints ------------------
 class SubjectList(Resource):
     @admin_required
@@ -291,8 +358,8 @@ class AllQuiz(Resource):
     @admin_required
     def get(self):
         try:
-            quizzes = get_all_quizzes()
-            return [
+            rows, next_cursor = find_quizzes(**_quiz_query_args())
+            quizzes = [
                 {
                     "id": quiz.id,
                     "title": quiz.title,
@@ -301,8 +368,14 @@ class AllQuiz(Resource):
                     "remarks": quiz.remarks,
                     "chapter_id": quiz.chapter_id,
                 }
-                for quiz in quizzes
-            ], 200
+                for quiz, *_ in rows
+            ]
+            # Paginate only when asked to, the admin views still load everything
+            if _paginated():
+                return {"items": quizzes, "next_cursor": next_cursor}, 200
+            return quizzes, 200
+        except ValueError as e:
+            return {"msg": str(e)}, 400
         except Exception as e:
             return {"msg": "Failed to fetch quizzes"}, 500
 
@@ -464,8 +537,92 @@ class UnblockUser(Resource):
 class AllQuizSummary(Resource):
     @admin_required
     def get(self):
-        summary = get_all_quiz_summary()
-        return summary, 200
+        try:
+            rows, next_cursor = find_quizzes(**_quiz_query_args())
+            summary = build_quiz_summaries(rows)
+            if _paginated():
+                return {"items": summary, "next_cursor": next_cursor}, 200
+            return summary, 200
+        except ValueError as e:
+            return {"msg": str(e)}, 400
+        except Exception as e:
+            return {"msg": "Failed to fetch quiz summary"}, 500
+
+
+# ------------------ Item Analysis Endpoints ------------------
+class QuizItemAnalysis(Resource):
+    @admin_required
+    def get(self, quiz_id):
+        try:
+            if not get_quiz_by_id(quiz_id):
+                return {"msg": "Quiz not found"}, 404
+            analysis = get_cached_item_analysis(quiz_id)
+            if analysis is not None:
+                return analysis, 200
+            # Computed in the background; the client polls until it is cached
+            task_id = None
+            if claim_item_analysis(quiz_id):
+                try:
+                    task_id = compute_item_analysis.delay(quiz_id).id
+                except Exception:
+                    # Otherwise polls wait for the claim to expire
+                    release_item_analysis_claim(quiz_id)
+                    raise
+            return {"msg": "Item analysis is being computed", "task_id": task_id}, 202
+        except Exception as e:
+            return {"msg": "Failed to get item analysis"}, 500
+
+
+# ------------------ Analytics Export Endpoints ------------------
+class AnalyticsExport(Resource):
+    @admin_required
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {"msg": "Request body must be a JSON object"}, 400
+        export_format = data.get("format", "parquet")
+        if export_format not in EXPORT_FORMATS:
+            return {"msg": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, 400
+        quiz_id = data.get("quiz_id")
+        if quiz_id is not None:
+            if not isinstance(quiz_id, int) or isinstance(quiz_id, bool):
+                return {"msg": "quiz_id must be an integer"}, 400
+            if not get_quiz_by_id(quiz_id):
+                return {"msg": "Quiz not found"}, 404
+        try:
+            # The admin polls AnalyticsExportStatus for the files
+            response = export_analytics_data.delay(export_format, quiz_id)
+            return {"msg": "Analytics export triggered", "task_id": response.id}, 202
+        except Exception as e:
+            return {"msg": "Failed to trigger analytics export"}, 500
+
+
+class AnalyticsExportStatus(Resource):
+    @admin_required
+    def get(self, task_id):
+        try:
+            result = export_analytics_data.AsyncResult(task_id)
+            if result.failed():
+                return {"msg": "Analytics export failed", "status": result.state}, 500
+            if not result.successful():
+                return {
+                    "msg": "Analytics export is running",
+                    "status": result.state,
+                }, 202
+            # Only results of export tasks, not of any other task id
+            export = result.result
+            if not isinstance(export, dict) or export.get("export_type") != "analytics":
+                return {"msg": "Analytics export not found"}, 404
+            return export, 200
+        except Exception as e:
+            return {"msg": "Failed to get analytics export status"}, 500
+
+
+class AnalyticsExportFile(Resource):
+    @admin_required
+    def get(self, filename):
+        # send_from_directory rejects names that leave the export folder
+        return send_from_directory(export_path(), filename, as_attachment=True)
 
 
 # ------------------ Route Registrations ------------------
@@ -487,3 +644,7 @@ admin_api.add_resource(BlockUser, "/block_user/<int:user_id>")
 admin_api.add_resource(UnblockUser, "/unblock_user/<int:user_id>")
 
 admin_api.add_resource(AllQuizSummary, "/quiz_summary")
+admin_api.add_resource(QuizItemAnalysis, "/quiz/<int:quiz_id>/item_analysis")
+admin_api.add_resource(AnalyticsExport, "/analytics/export")
+admin_api.add_resource(AnalyticsExportStatus, "/analytics/export/<string:task_id>")
+admin_api.add_resource(AnalyticsExportFile, "/analytics/export/files/<string:filename>")
@@ -26,7 +26,10 @@ class Login(Resource):
             if user and user.check_password(password):
                 token = create_access_token(
                     identity=username,
-                    additional_claims={"is_admin": bool(user.is_admin)},
+                    additional_claims={
+                        "is_admin": bool(user.is_admin),
+                        "user_id": user.id,
+                    },
                 )
                 role = "admin" if user.is_admin else "user"
                 if user.is_blocked:
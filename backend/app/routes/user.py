@@ -1,25 +1,34 @@
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from flask_restful import Api, Resource
-from flask import Blueprint, request
-from app.models import User
+from flask import Blueprint, Response, request
 from app.services.catalog import (
     get_all_subjects,
     get_chapters_by_subject,
     get_all_quizzes,
-    get_questions_by_quiz,
     get_quiz_by_id,
     get_leaderboard_by_quiz_id,
+    get_quiz_payload,
+    get_score_distribution,
+    get_scope_leaderboard,
 )
 from app.services.user.quiz_service import (
     create_quiz_attempt,
     save_user_response,
+    save_user_responses,
     close_quiz_attempt,
     get_user_responses,
     get_quiz_score,
     get_full_quiz_result,
     get_user_quiz_history,
+    get_user_quiz_history_page,
 )
+from app.utils.pagination import parse_limit, parse_offset
 
+from app.services.user.identity_service import (
+    get_user_identity,
+    get_user_id_by_username,
+)
+from app.services.user.user_stats_service import get_user_summary
 from app.tasks.user_tasks import export_user_data_csv
 
 user_bp = Blueprint("user_api", __name__)
@@ -27,20 +36,28 @@ user_bp = Blueprint("user_api", __name__)
 user_api = Api(user_bp)
 
 
+def current_user_id():
+    """user_id from the JWT claims, so hot paths skip the User lookup."""
+    user_id = get_jwt().get("user_id")
+    if user_id is None:
+        # Token issued before the user_id claim was added
+        user_id = get_user_id_by_username(get_jwt_identity())
+    return user_id
+
+
 class ProfileInfo(Resource):
     @jwt_required()
     def get(self):
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = get_user_identity(current_user_id())
         if not user:
             return {"msg": "User not found"}, 404
         return {
-            "user_id": user.id,
-            "username": user.username,
-            "full_name": user.full_name,
-            "email": user.email,
-            "date_of_birth": str(user.date_of_birth),
-            "role": "admin" if user.is_admin else "user",
+            "user_id": user["id"],
+            "username": user["username"],
+            "full_name": user["full_name"],
+            "email": user["email"],
+            "date_of_birth": str(user["date_of_birth"]),
+            "role": "admin" if user["is_admin"] else "user",
         }, 200
 
 
@@ -88,39 +105,19 @@ class UserQuestions(Resource):
     @jwt_required()
     def get(self, quiz_id):
         try:
-            quiz = get_quiz_by_id(quiz_id)
-            if not quiz:
+            payload = get_quiz_payload(quiz_id)
+            if not payload:
                 return {"msg": "Quiz not found"}, 404
-            questions = get_questions_by_quiz(quiz_id)
 
-            return {
-                "quiz_id": quiz_id,
-                "quiz_details": {
-                    "quiz_id": quiz_id,
-                    "quiz_title": quiz.title,
-                    "quiz_date": quiz.quiz_date.isoformat(),
-                    "time_duration": quiz.time_duration,
-                    "remarks": quiz.remarks,
-                    "chapter_id": quiz.chapter_id,
-                    "chapter_name": quiz.chapter.name,
-                    "subject_name": quiz.chapter.subject.name,
-                },
-                "questions": [
-                    {
-                        "id": q.id,
-                        "question": q.question,
-                        "max_marks": q.max_marks,
-                        "options": [
-                            {
-                                "id": opt.id,
-                                "option_text": opt.option_text,
-                            }
-                            for opt in q.options
-                        ],
-                    }
-                    for q in questions
-                ],
-            }, 200
+            # The body is cached pre-serialized; clients that already hold
+            # this version get an empty 304
+            if request.if_none_match.contains(payload["etag"]):
+                response = Response(status=304)
+            else:
+                response = Response(payload["body"], mimetype="application/json")
+            response.set_etag(payload["etag"])
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
         except Exception as e:
             return {"msg": "Failed to fetch questions"}, 500
 
@@ -128,10 +125,9 @@ class UserQuestions(Resource):
     def post(self, quiz_id):
         """Starts a new quiz attempt or returns existing attempt"""
         try:
-            username = get_jwt_identity()
-            user = User.query.filter_by(username=username).first()
+            user_id = current_user_id()
 
-            quiz_attempt, is_new = create_quiz_attempt(user.id, quiz_id)
+            quiz_attempt, is_new = create_quiz_attempt(user_id, quiz_id)
 
             if is_new:
                 return {
@@ -156,10 +152,9 @@ class QuizAttempt(Resource):
     @jwt_required()
     def get(self, quiz_id):
         try:
-            username = get_jwt_identity()
-            user = User.query.filter_by(username=username).first()
+            user_id = current_user_id()
 
-            responses = get_user_responses(user.id, quiz_id)
+            responses = get_user_responses(user_id, quiz_id)
             if not responses:
                 return {"msg": "No active attempt found"}, 404
             return {
@@ -180,12 +175,25 @@ class QuizAttempt(Resource):
 
     @jwt_required()
     def post(self, quiz_id):
-        """Submit or update answer for a question"""
+        """
+        Submit or update answers.
+
+        Accepts either a single {"question_id", "selected_option_id"} payload or
+        {"answers": [{"question_id", "selected_option_id"}, ...]} to save a batch
+        of answers in one transaction.
+        """
         try:
-            username = get_jwt_identity()
-            user = User.query.filter_by(username=username).first()
+            user_id = current_user_id()
 
             data = request.get_json()
+            if data and "answers" in data:
+                if not isinstance(data["answers"], list):
+                    return {"msg": "answers must be a list"}, 400
+                saved = save_user_responses(
+                    user_id=user_id, quiz_id=quiz_id, answers=data["answers"]
+                )
+                return {"msg": "Answers recorded successfully", "saved": saved}, 201
+
             if (
                 not data
                 or "question_id" not in data
@@ -194,7 +202,7 @@ class QuizAttempt(Resource):
                 return {"msg": "Missing question_id or selected_option_id"}, 400
 
             response = save_user_response(
-                user_id=user.id,
+                user_id=user_id,
                 quiz_id=quiz_id,
                 question_id=data["question_id"],
                 selected_option_id=data["selected_option_id"],
@@ -216,13 +224,12 @@ class QuizAttemptStartStop(Resource):
     def post(self, quiz_id):
         """Start a new quiz attempt"""
         try:
-            username = get_jwt_identity()
-            user = User.query.filter_by(username=username).first()
+            user_id = current_user_id()
 
             data = request.get_json()
             if data and data.get("start_quiz"):
                 # Open the quiz attempt if it is not already open
-                attempt, status = create_quiz_attempt(user.id, quiz_id)
+                attempt, status = create_quiz_attempt(user_id, quiz_id)
                 if status:
                     return {"msg": "Quiz attempt started successfully"}, 201
                 else:
@@ -245,12 +252,11 @@ class QuizAttemptStartStop(Resource):
     def put(self, quiz_id):
         """Stop the current quiz attempt"""
         try:
-            username = get_jwt_identity()
-            user = User.query.filter_by(username=username).first()
+            user_id = current_user_id()
 
             data = request.get_json()
             if data and data.get("stop_quiz"):
-                attempt = close_quiz_attempt(user.id, quiz_id)
+                attempt = close_quiz_attempt(user_id, quiz_id)
                 return {"msg": "Quiz attempt submitted successfully"}, 200
             else:
                 return {"msg": 'Invalid payload. Use {"stop_quiz": true}'}, 400
@@ -265,9 +271,8 @@ class QuizResult(Resource):
     @jwt_required()
     def get(self, quiz_id):
         try:
-            username = get_jwt_identity()
-            user = User.query.filter_by(username=username).first()
-            result = get_full_quiz_result(user.id, quiz_id)
+            user_id = current_user_id()
+            result = get_full_quiz_result(user_id, quiz_id)
             return result, 200
         except ValueError as e:
             return {"msg": str(e)}, 400
@@ -282,22 +287,39 @@ class UserQuizHistory(Resource):
     @jwt_required()
     def get(self):
         try:
-            username = get_jwt_identity()
-            user = User.query.filter_by(username=username).first()
-            history = get_user_quiz_history(user.id)
+            user_id = current_user_id()
+            # Paginate only when asked to, the dashboard still loads everything
+            if "limit" in request.args or "cursor" in request.args:
+                history, next_cursor = get_user_quiz_history_page(
+                    user_id,
+                    limit=parse_limit(request.args.get("limit")),
+                    cursor=request.args.get("cursor"),
+                )
+                return {"history": history, "next_cursor": next_cursor}, 200
+            history = get_user_quiz_history(user_id)
             return history, 200
+        except ValueError as e:
+            return {"msg": str(e)}, 400
         except Exception as e:
             return {"msg": "Failed to get quiz history"}, 500
 
 
+class UserSummary(Resource):
+    @jwt_required()
+    def get(self):
+        try:
+            return get_user_summary(current_user_id()), 200
+        except Exception as e:
+            return {"msg": "Failed to get summary"}, 500
+
+
 class DownloadHistory(Resource):
     @jwt_required()
     def post(self):
         try:
-            username = get_jwt_identity()
-            user = User.query.filter_by(username=username).first()
+            user_id = current_user_id()
             # trigger csv download
-            response = export_user_data_csv.delay(user.id)
+            response = export_user_data_csv.delay(user_id)
             print(f"Task ID: {response.id}")
             return {"msg": "CSV download triggered", "task_id": response.id}, 200
         except Exception as e:
@@ -308,12 +330,57 @@ class Leaderboard(Resource):
     @jwt_required()
     def get(self, quiz_id):
         try:
-            leaderboard = get_leaderboard_by_quiz_id(quiz_id)
+            # Without limit the whole board is returned, as before
+            limit = request.args.get("limit")
+            leaderboard = get_leaderboard_by_quiz_id(
+                quiz_id,
+                offset=parse_offset(request.args.get("offset")),
+                limit=None if limit is None else parse_limit(limit),
+                cursor=request.args.get("cursor"),
+                user_id=current_user_id(),
+            )
             return leaderboard, 200
+        except ValueError as e:
+            return {"msg": str(e)}, 400
         except Exception as e:
             return {"msg": "Failed to get leaderboard"}, 500
 
 
+class ScopeLeaderboard(Resource):
+    @jwt_required()
+    def get(self, scope, scope_id):
+        try:
+            limit = request.args.get("limit")
+            leaderboard = get_scope_leaderboard(
+                scope,
+                scope_id,
+                metric=request.args.get("metric") or "total",
+                offset=parse_offset(request.args.get("offset")),
+                limit=None if limit is None else parse_limit(limit),
+                cursor=request.args.get("cursor"),
+                user_id=current_user_id(),
+            )
+            if leaderboard is None:
+                return {"msg": f"{scope.capitalize()} not found"}, 404
+            return leaderboard, 200
+        except ValueError as e:
+            return {"msg": str(e)}, 400
+        except Exception as e:
+            return {"msg": "Failed to get leaderboard"}, 500
+
+
+class ScoreDistribution(Resource):
+    @jwt_required()
+    def get(self, quiz_id):
+        try:
+            if not get_quiz_by_id(quiz_id):
+                return {"msg": "Quiz not found"}, 404
+            distribution = get_score_distribution(quiz_id, current_user_id())
+            return distribution, 200
+        except Exception as e:
+            return {"msg": "Failed to get score distribution"}, 500
+
+
 user_api.add_resource(ProfileInfo, "/profileinfo")
 user_api.add_resource(UserSubjects, "/subjects")
 user_api.add_resource(UserQuizzes, "/quizzes")
@@ -322,5 +389,8 @@ user_api.add_resource(QuizAttempt, "/quiz/<int:quiz_id>/attempt")
 user_api.add_resource(QuizAttemptStartStop, "/quiz/<int:quiz_id>")
 user_api.add_resource(QuizResult, "/quiz/<int:quiz_id>/result")
 user_api.add_resource(UserQuizHistory, "/quiz/history")
+user_api.add_resource(UserSummary, "/summary")
 user_api.add_resource(DownloadHistory, "/quiz/history/download")
 user_api.add_resource(Leaderboard, "/quiz/<int:quiz_id>/leaderboard")
+user_api.add_resource(ScoreDistribution, "/quiz/<int:quiz_id>/distribution")
+user_api.add_resource(ScopeLeaderboard, "/leaderboard/<string:scope>/<int:scope_id>")
@@ -0,0 +1,200 @@
+import os
+import uuid
+from datetime import datetime, timezone
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from flask import current_app
+from app import db
+from app.models import Chapter, Option, Quiz, QuizAttempt, Subject, UserResponse
+
+EXPORT_FORMATS = ("parquet", "arrow")
+# Rows fetched per round trip and written per Parquet row group / Arrow batch
+EXPORT_CHUNK_SIZE = 50_000
+
+_QUIZ_COLUMNS = [
+    ("quiz_id", pa.int64()),
+    ("quiz_title", pa.string()),
+    ("quiz_date", pa.timestamp("us")),
+    ("chapter_id", pa.int64()),
+    ("chapter_name", pa.string()),
+    ("subject_id", pa.int64()),
+    ("subject_name", pa.string()),
+]
+ATTEMPTS_SCHEMA = pa.schema(
+    [
+        ("attempt_id", pa.int64()),
+        ("user_id", pa.int64()),
+        *_QUIZ_COLUMNS,
+        ("start_time", pa.timestamp("us")),
+        ("end_time", pa.timestamp("us")),
+        ("duration_seconds", pa.float64()),
+        ("score", pa.float64()),
+        ("max_marks", pa.float64()),
+        ("total_questions", pa.int32()),
+        ("attempted_count", pa.int32()),
+        ("correct_count", pa.int32()),
+        ("wrong_count", pa.int32()),
+    ]
+)
+RESPONSES_SCHEMA = pa.schema(
+    [
+        ("response_id", pa.int64()),
+        ("attempt_id", pa.int64()),
+        ("user_id", pa.int64()),
+        *_QUIZ_COLUMNS,
+        ("question_id", pa.int64()),
+        ("option_id", pa.int64()),
+        ("is_attempted", pa.bool_()),
+        ("is_correct", pa.bool_()),
+    ]
+)
+
+_QUIZ_ENTITIES = (
+    Quiz.id.label("quiz_id"),
+    Quiz.title.label("quiz_title"),
+    Quiz.quiz_date,
+    Chapter.id.label("chapter_id"),
+    Chapter.name.label("chapter_name"),
+    Subject.id.label("subject_id"),
+    Subject.name.label("subject_name"),
+)
+
+
+def _completed_attempts(query, quiz_id):
+    query = (
+        query.join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .join(Subject, Subject.id == Chapter.subject_id)
+        .filter(QuizAttempt.in_progress == False)
+    )
+    if quiz_id is not None:
+        query = query.filter(QuizAttempt.quiz_id == quiz_id)
+    return query
+
+
+def _attempts_query(quiz_id=None):
+    return _completed_attempts(
+        db.session.query(
+            QuizAttempt.id.label("attempt_id"),
+            QuizAttempt.user_id,
+            *_QUIZ_ENTITIES,
+            QuizAttempt.start_time,
+            QuizAttempt.end_time,
+            QuizAttempt.duration_seconds,
+            QuizAttempt.score,
+            QuizAttempt.max_marks,
+            QuizAttempt.total_questions,
+            QuizAttempt.attempted_count,
+            QuizAttempt.correct_count,
+            QuizAttempt.wrong_count,
+        ),
+        quiz_id,
+    ).order_by(QuizAttempt.id)
+
+
+def _responses_query(quiz_id=None):
+    return (
+        _completed_attempts(
+            db.session.query(
+                UserResponse.id.label("response_id"),
+                UserResponse.attempt_id,
+                QuizAttempt.user_id,
+                *_QUIZ_ENTITIES,
+                UserResponse.question_id,
+                UserResponse.option_id,
+                UserResponse.is_attempted,
+                Option.is_correct,
+            )
+            .select_from(UserResponse)
+            .join(QuizAttempt, QuizAttempt.id == UserResponse.attempt_id)
+            .outerjoin(Option, Option.id == UserResponse.option_id),
+            quiz_id,
+        )
+    ).order_by(UserResponse.id)
+
+
+def _record_batch(rows, schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+class _ArrowFileWriter:
+    def __init__(self, path, schema):
+        self._sink = pa.OSFile(path, "wb")
+        self._writer = ipc.new_file(self._sink, schema)
+
+    def write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        self._sink.close()
+
+
+def _open_writer(path, schema, export_format):
+    if export_format == "parquet":
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    return _ArrowFileWriter(path, schema)
+
+
+def write_query(query, schema, path, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream the rows of query into a Parquet or Arrow IPC file, one row group
+    or record batch per chunk of chunk_size rows, so memory use depends on
+    the chunk size rather than the table size. Returns the number of rows.
+    """
+    writer = _open_writer(path, schema, export_format)
+    total = 0
+    try:
+        # Executed as Core on the session's connection: yield_per streams the
+        # result with a server-side cursor where the driver has one, and
+        # partitions() hands over plain rows a chunk at a time
+        result = (
+            db.session.connection()
+            .execution_options(yield_per=chunk_size)
+            .execute(query.statement)
+        )
+        for rows in result.partitions():
+            writer.write_batch(_record_batch(rows, schema))
+            total += len(rows)
+    finally:
+        writer.close()
+    return total
+
+
+def export_path():
+    """Folder of the analytics exports, outside the static folder."""
+    backend_dir = os.path.dirname(current_app.config["BASE_DIR"])
+    return os.path.join(backend_dir, current_app.config["ANALYTICS_EXPORT_FOLDER"])
+
+
+def export_analytics(export_format="parquet", quiz_id=None):
+    """
+    Write the completed attempts and their responses, with quiz, chapter and
+    subject columns, to two files in the analytics export folder. Returns the
+    admin download url and row count of each.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    folder = export_path()
+    extension = "parquet" if export_format == "parquet" else "arrow"
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    scope = f"quiz_{quiz_id}" if quiz_id is not None else "all"
+
+    files = {}
+    for dataset, query, schema in (
+        ("attempts", _attempts_query(quiz_id), ATTEMPTS_SCHEMA),
+        ("responses", _responses_query(quiz_id), RESPONSES_SCHEMA),
+    ):
+        filename = f"{dataset}_{scope}_{stamp}_{uuid.uuid4().hex}.{extension}"
+        rows = write_query(query, schema, os.path.join(folder, filename), export_format)
+        files[dataset] = {
+            "filename": filename,
+            "download_url": f"/admin/api/analytics/export/files/{filename}",
+            "rows": rows,
+        }
+    return files
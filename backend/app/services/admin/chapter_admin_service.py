@@ -2,6 +2,7 @@ from app.models.chapter import Chapter
 from app import db
 from app import cache
 from app.services.catalog.chapter_service import get_chapters_by_subject
+from app.services.catalog.quiz_payload_service import invalidate_quiz_payload
 
 
 def create_chapter(subject_id, data):
@@ -26,6 +27,9 @@ def update_chapter(chapter_id, data):
     chapter.description = data.get("description", chapter.description)
     db.session.commit()
     cache.delete_memoized(get_chapters_by_subject, chapter.subject_id)
+    # Quiz payloads embed the chapter name
+    for quiz in chapter.quizzes:
+        invalidate_quiz_payload(quiz.id)
     return chapter
 
 
@@ -0,0 +1,187 @@
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from app import db, cache
+from app.models.quiz_attempt import QuizAttempt
+from app.models.quiz_stats import QuizStats
+from app.models.question import Question
+from app.models.option import Option
+from app.models.user_response import UserResponse
+from app.services.catalog.quiz_content_service import get_quiz_content_version
+
+# Results are keyed by the content version and attempt count of the quiz, so
+# a new submit or an admin edit makes the next request compute a fresh one.
+ITEM_ANALYSIS_CACHE_KEY = "item_analysis:{}:{}:{}"
+ITEM_ANALYSIS_PENDING_KEY = "item_analysis:{}:pending"
+ITEM_ANALYSIS_TIMEOUT = 60 * 60 * 24
+ITEM_ANALYSIS_PENDING_TIMEOUT = 600
+# Share of attempts in the upper and lower groups of the discrimination index
+GROUP_FRACTION = 0.27
+
+
+def _item_analysis_key(quiz_id):
+    attempt_count = (
+        db.session.query(QuizStats.attempt_count).filter_by(quiz_id=quiz_id).scalar()
+    )
+    return ITEM_ANALYSIS_CACHE_KEY.format(
+        quiz_id, get_quiz_content_version(quiz_id), attempt_count or 0
+    )
+
+
+def _read_frame(query):
+    return pd.read_sql_query(query.statement, db.session.connection())
+
+
+def _rate(value):
+    return None if value is None or np.isnan(value) else round(float(value), 4)
+
+
+def compute_item_analysis(quiz_id):
+    """
+    Difficulty (share of attempts answering correctly), discrimination index
+    (difficulty in the top 27% of attempts by score minus the bottom 27%) and
+    option selection rates of every question of a quiz, over its completed
+    attempts. Unanswered questions count as wrong.
+    """
+    completed = [QuizAttempt.quiz_id == quiz_id, QuizAttempt.in_progress == False]
+    attempts = _read_frame(
+        db.session.query(QuizAttempt.id.label("attempt_id"), QuizAttempt.score)
+        .filter(*completed)
+        .order_by(QuizAttempt.id)
+    )
+    questions = _read_frame(
+        db.session.query(
+            Question.id.label("question_id"), Question.question, Question.max_marks
+        )
+        .filter(Question.quiz_id == quiz_id)
+        .order_by(Question.id)
+    )
+    options = _read_frame(
+        db.session.query(
+            Option.id.label("option_id"),
+            Option.question_id,
+            Option.option_text,
+            Option.is_correct,
+        )
+        .join(Question, Question.id == Option.question_id)
+        .filter(Question.quiz_id == quiz_id)
+        .order_by(Option.id)
+    )
+    responses = _read_frame(
+        db.session.query(
+            UserResponse.attempt_id, UserResponse.question_id, UserResponse.option_id
+        )
+        .join(QuizAttempt, QuizAttempt.id == UserResponse.attempt_id)
+        .filter(
+            *completed,
+            UserResponse.is_attempted == True,
+            UserResponse.option_id.isnot(None),
+        )
+    )
+
+    n_attempts = len(attempts)
+    n_questions = len(questions)
+    options["is_correct"] = options["is_correct"].fillna(False).astype(bool)
+
+    # Attempt x question matrix of correct answers
+    responses = responses.merge(
+        options[["option_id", "question_id", "is_correct"]],
+        on=["option_id", "question_id"],
+        how="left",
+    )
+    correct = responses[responses["is_correct"].fillna(False).astype(bool)]
+    rows = pd.Index(attempts["attempt_id"]).get_indexer(correct["attempt_id"])
+    cols = pd.Index(questions["question_id"]).get_indexer(correct["question_id"])
+    known = (rows >= 0) & (cols >= 0)
+    matrix = np.zeros((n_attempts, n_questions), dtype=bool)
+    matrix[rows[known], cols[known]] = True
+
+    difficulty = np.full(n_questions, np.nan)
+    discrimination = np.full(n_questions, np.nan)
+    if n_attempts:
+        difficulty = matrix.mean(axis=0)
+    if n_attempts >= 2:
+        group = max(1, int(round(n_attempts * GROUP_FRACTION)))
+        by_score = np.argsort(-attempts["score"].to_numpy(), kind="stable")
+        upper = matrix[by_score[:group]].mean(axis=0)
+        lower = matrix[by_score[-group:]].mean(axis=0)
+        discrimination = upper - lower
+
+    selections = responses["option_id"].value_counts()
+    answered = responses.groupby("question_id")["attempt_id"].nunique()
+    options["selection_rate"] = (
+        options["option_id"].map(selections).fillna(0) / n_attempts
+        if n_attempts
+        else np.nan
+    )
+    options_by_question = {
+        question_id: group for question_id, group in options.groupby("question_id")
+    }
+
+    results = []
+    for index, question in enumerate(questions.itertuples(index=False)):
+        question_options = options_by_question.get(question.question_id)
+        unanswered = (
+            1 - answered.get(question.question_id, 0) / n_attempts
+            if n_attempts
+            else None
+        )
+        results.append(
+            {
+                "question_id": int(question.question_id),
+                "question": question.question,
+                "max_marks": float(question.max_marks),
+                "difficulty": _rate(difficulty[index]),
+                "discrimination": _rate(discrimination[index]),
+                "unanswered_rate": _rate(unanswered),
+                "options": (
+                    [
+                        {
+                            "option_id": int(option.option_id),
+                            "option_text": option.option_text,
+                            "is_correct": bool(option.is_correct),
+                            "selection_rate": _rate(option.selection_rate),
+                        }
+                        for option in question_options.itertuples(index=False)
+                    ]
+                    if question_options is not None
+                    else []
+                ),
+            }
+        )
+
+    return {
+        "quiz_id": quiz_id,
+        "attempt_count": n_attempts,
+        "response_count": len(responses),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "questions": results,
+    }
+
+
+def refresh_item_analysis(quiz_id):
+    """Compute the item analysis of a quiz and cache it."""
+    key = _item_analysis_key(quiz_id)
+    analysis = compute_item_analysis(quiz_id)
+    cache.set(key, analysis, ITEM_ANALYSIS_TIMEOUT)
+    cache.delete(ITEM_ANALYSIS_PENDING_KEY.format(quiz_id))
+    return analysis
+
+
+def get_cached_item_analysis(quiz_id):
+    """The cached analysis if no attempt was submitted since, else None."""
+    return cache.get(_item_analysis_key(quiz_id))
+
+
+def claim_item_analysis(quiz_id):
+    """True for the first caller to ask for a computation of a quiz."""
+    return cache.add(
+        ITEM_ANALYSIS_PENDING_KEY.format(quiz_id),
+        True,
+        timeout=ITEM_ANALYSIS_PENDING_TIMEOUT,
+    )
+
+
+def release_item_analysis_claim(quiz_id):
+    """Let the next request ask again, e.g. when queueing the task failed."""
+    cache.delete(ITEM_ANALYSIS_PENDING_KEY.format(quiz_id))
@@ -1,7 +1,7 @@
 from app.models.question import Question
 from app.models.option import Option
-from app import db, cache
-from app.services.catalog.question_service import get_questions_by_quiz
+from app import db
+from app.services.catalog.quiz_content_service import invalidate_quiz_content
 
 
 def create_question(quiz_id, data):
@@ -23,7 +23,7 @@ def create_question(quiz_id, data):
         db.session.add(option)
 
     db.session.commit()
-    cache.delete_memoized(get_questions_by_quiz, quiz_id)
+    invalidate_quiz_content(quiz_id)
     return question
 
 
@@ -53,7 +53,7 @@ def update_question(question_id, data):
             db.session.add(new_option)
 
     db.session.commit()
-    cache.delete_memoized(get_questions_by_quiz, quiz_id)
+    invalidate_quiz_content(quiz_id)
     return question
 
 
@@ -70,5 +70,5 @@ def delete_question(question_id):
 
     db.session.delete(question)
     db.session.commit()
-    cache.delete_memoized(get_questions_by_quiz, quiz_id)
+    invalidate_quiz_content(quiz_id)
     return True
@@ -2,10 +2,19 @@ from app.models.quiz import Quiz
 from app.models.chapter import Chapter
 from app.models.subject import Subject
 from app.models.question import Question
-from app.models.quiz_attempt import QuizAttempt
+from app.models.quiz_stats import QuizStats
 from app.models.user import User
 from app import db
-from sqlalchemy import func, desc
+from app.services.catalog.quiz_payload_service import invalidate_quiz_payload
+from app.services.catalog.leaderboard_service import delete_quiz_leaderboard
+from app.services.catalog.quiz_stats_service import delete_quiz_stats
+from app.services.catalog.score_distribution_service import delete_score_histogram
+from app.services.catalog.scope_leaderboard_service import (
+    invalidate_scope_leaderboards,
+)
+from app.services.user.user_stats_service import rebuild_user_stats
+from app.utils.pagination import encode_cursor, decode_cursor
+from sqlalchemy import and_, case, func, or_
 from datetime import datetime
 
 
@@ -38,9 +47,16 @@ def update_quiz(quiz_id, data):
         chapter = Chapter.query.get(data["chapter_id"])
         if not chapter:
             raise ValueError("Invalid chapter ID")
+        previous_chapter_id = quiz.chapter_id
         quiz.chapter_id = data["chapter_id"]
 
     db.session.commit()
+    invalidate_quiz_payload(quiz_id)
+    if "chapter_id" in data and previous_chapter_id != quiz.chapter_id:
+        # Its attempts now count towards other chapter/subject boards
+        invalidate_scope_leaderboards(previous_chapter_id)
+        invalidate_scope_leaderboards(quiz.chapter_id)
+        rebuild_user_stats(quiz_id=quiz_id)
     return quiz
 
 
@@ -50,91 +66,166 @@ def delete_quiz(quiz_id):
     if not quiz:
         return False
 
+    chapter_id = quiz.chapter_id
+    delete_quiz_stats(quiz_id)
     db.session.delete(quiz)
     db.session.commit()
+    invalidate_quiz_payload(quiz_id)
+    delete_quiz_leaderboard(quiz_id)
+    delete_score_histogram(quiz_id)
+    invalidate_scope_leaderboards(chapter_id)
     return True
 
 
-def get_all_quiz_summary():
-    # Get all quizzes with their chapter and subject information
-    quizzes = (
-        db.session.query(Quiz, Chapter, Subject)
-        .join(Chapter, Quiz.chapter_id == Chapter.id)
-        .join(Subject, Chapter.subject_id == Subject.id)
-        .all()
-    )
+QUIZ_SORT_KEYS = ("date", "attempts", "avg_score")
 
-    quiz_summaries = []
 
-    for quiz, chapter, subject in quizzes:
-        # Get question count and total marks for this quiz
-        question_stats = (
-            db.session.query(
-                func.count(Question.id).label("total_questions"),
-                func.sum(Question.max_marks).label("total_marks"),
-            )
-            .filter(Question.quiz_id == quiz.id)
-            .first()
+def _quiz_sort_expression(sort):
+    if sort == "date":
+        return Quiz.quiz_date
+    if sort == "attempts":
+        return func.coalesce(QuizStats.attempt_count, 0)
+    if sort == "avg_score":
+        return case(
+            (
+                QuizStats.attempt_count > 0,
+                QuizStats.score_sum / QuizStats.attempt_count,
+            ),
+            else_=0.0,
         )
+    raise ValueError(f"sort must be one of: {', '.join(QUIZ_SORT_KEYS)}")
 
-        total_questions = question_stats.total_questions or 0
-        total_marks = (
-            float(question_stats.total_marks) if question_stats.total_marks else 0
+
+def find_quizzes(filters=None, sort=None, order="desc", limit=None, cursor=None):
+    """
+    Quizzes with their chapter, subject, quiz_stats row and top performer name,
+    as (Quiz, Chapter, Subject, QuizStats, full_name, sort_value) rows.
+
+    filters may hold subject_id, chapter_id, date_from (inclusive), date_until
+    (exclusive) and has_attempts. With limit, rows come in pages ordered by
+    sort (default "date") then id, and the cursor of the next page is
+    returned; without limit or sort, every match is returned unordered.
+    Returns (rows, next_cursor).
+    """
+    filters = filters or {}
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    if sort is None and (limit is not None or cursor):
+        sort = "date"
+    sort_value = _quiz_sort_expression(sort or "date").label("sort_value")
+
+    query = (
+        db.session.query(Quiz, Chapter, Subject, QuizStats, User.full_name, sort_value)
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+        .outerjoin(QuizStats, QuizStats.quiz_id == Quiz.id)
+        .outerjoin(User, User.id == QuizStats.top_user_id)
+    )
+    if filters.get("subject_id") is not None:
+        query = query.filter(Chapter.subject_id == filters["subject_id"])
+    if filters.get("chapter_id") is not None:
+        query = query.filter(Quiz.chapter_id == filters["chapter_id"])
+    if filters.get("date_from") is not None:
+        query = query.filter(Quiz.quiz_date >= filters["date_from"])
+    if filters.get("date_until") is not None:
+        query = query.filter(Quiz.quiz_date < filters["date_until"])
+    if filters.get("has_attempts") is True:
+        query = query.filter(QuizStats.attempt_count > 0)
+    elif filters.get("has_attempts") is False:
+        query = query.filter(
+            or_(QuizStats.quiz_id.is_(None), QuizStats.attempt_count == 0)
         )
-        # Get attempt statistics
-        attempt_stats = (
-            db.session.query(
-                func.count(QuizAttempt.id).label("total_attempts"),
-                func.max(QuizAttempt.score).label("max_score"),
-                func.min(QuizAttempt.score).label("min_score"),
-                func.avg(QuizAttempt.score).label("avg_score"),
+
+    if sort is None:
+        return query.all(), None
+
+    expression = sort_value.element
+    descending = order == "desc"
+    if cursor:
+        try:
+            cursor_sort, value, last_id = decode_cursor(cursor)
+            if sort == "date":
+                value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if cursor_sort != f"{sort}:{order}":
+            raise ValueError("Cursor does not match sort and order")
+        if descending:
+            after = or_(
+                expression < value, and_(expression == value, Quiz.id < last_id)
             )
-            .filter(
-                QuizAttempt.quiz_id == quiz.id,
-                QuizAttempt.in_progress == False,  # Only completed attempts
+        else:
+            after = or_(
+                expression > value, and_(expression == value, Quiz.id > last_id)
             )
-            .first()
-        )
+        query = query.filter(after)
+    if descending:
+        query = query.order_by(expression.desc(), Quiz.id.desc())
+    else:
+        query = query.order_by(expression.asc(), Quiz.id.asc())
+
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        value = last.sort_value
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        next_cursor = encode_cursor([f"{sort}:{order}", value, last.Quiz.id])
+    return rows, next_cursor
+
 
-        # Calculate average time spent in Python for better reliability
-        attempts_with_times = (
-            db.session.query(QuizAttempt.start_time, QuizAttempt.end_time)
-            .filter(
-                QuizAttempt.quiz_id == quiz.id,
-                QuizAttempt.in_progress == False,
-                QuizAttempt.end_time.isnot(None),
+def get_all_quiz_summary():
+    """
+    Summaries of every quiz for the admin dashboard. Attempt statistics come
+    from quiz_stats, so this never scans quiz_attempt.
+    """
+    rows, _ = find_quizzes()
+    return build_quiz_summaries(rows)
+
+
+def build_quiz_summaries(rows):
+    """Summaries of the quizzes of find_quizzes rows, in the same order."""
+    # Question count and total marks per quiz
+    quiz_ids = [row.Quiz.id for row in rows]
+    question_stats = {}
+    if quiz_ids:
+        question_stats = {
+            row.quiz_id: row
+            for row in db.session.query(
+                Question.quiz_id,
+                func.count(Question.id).label("total_questions"),
+                func.sum(Question.max_marks).label("total_marks"),
             )
-            .all()
-        )
+            .filter(Question.quiz_id.in_(quiz_ids))
+            .group_by(Question.quiz_id)
+        }
 
-        # Calculate average time spent in minutes
-        total_time_minutes = 0
-        valid_attempts = 0
+    quiz_summaries = []
 
-        for start_time, end_time in attempts_with_times:
-            if start_time and end_time:
-                # Calculate time difference in seconds, then convert to minutes
-                time_diff_seconds = (end_time - start_time).total_seconds()
-                time_diff_minutes = time_diff_seconds / 60
-                total_time_minutes += time_diff_minutes
-                valid_attempts += 1
+    for quiz, chapter, subject, stats, top_name, _ in rows:
+        questions = question_stats.get(quiz.id)
+        attempts = stats.attempt_count if stats else 0
 
-        avg_time_spent = (
-            total_time_minutes / valid_attempts if valid_attempts > 0 else 0
+        total_questions = questions.total_questions if questions else 0
+        total_marks = (
+            float(questions.total_marks) if questions and questions.total_marks else 0
         )
         # Validate score calculations
-        max_score = float(attempt_stats.max_score) if attempt_stats.max_score else 0
-        min_score = float(attempt_stats.min_score) if attempt_stats.min_score else 0
-        avg_score = float(attempt_stats.avg_score) if attempt_stats.avg_score else 0
-
-        # Get user with highest score
-        top_performer = (
-            db.session.query(User.id, User.full_name, QuizAttempt.score)
-            .join(QuizAttempt, User.id == QuizAttempt.user_id)
-            .filter(QuizAttempt.quiz_id == quiz.id, QuizAttempt.in_progress == False)
-            .order_by(desc(QuizAttempt.score))
-            .first()
+        max_score = float(stats.score_max) if attempts and stats.score_max else 0
+        min_score = float(stats.score_min) if attempts and stats.score_min else 0
+        avg_score = float(stats.score_sum / attempts) if attempts else 0
+        # Time spent in minutes
+        total_time_minutes = stats.duration_sum / 60 if attempts else 0
+        avg_time_spent = (
+            stats.duration_sum / stats.duration_count / 60
+            if attempts and stats.duration_count
+            else 0
         )
+
         # Build summary object
         summary = {
             "quiz_id": quiz.id,
@@ -147,7 +238,7 @@ def get_all_quiz_summary():
             "quiz_chapter_id": chapter.id,
             "quiz_chapter_name": chapter.name,
             "total_questions": total_questions,
-            "total_attempts": attempt_stats.total_attempts or 0,
+            "total_attempts": attempts,
             "Max_score": max_score,
             "Min_score": min_score,
             "Avg_score": avg_score,
@@ -155,11 +246,11 @@ def get_all_quiz_summary():
             "Avg_time_spent": avg_time_spent,
             "top_performer": (
                 {
-                    "user_id": top_performer.id,
-                    "user_name": top_performer.full_name,
-                    "score": float(top_performer.score),
+                    "user_id": stats.top_user_id,
+                    "user_name": top_name,
+                    "score": float(stats.top_score),
                 }
-                if top_performer
+                if attempts and stats.top_user_id is not None
                 else None
             ),
         }
@@ -1,5 +1,6 @@
 from app.models.subject import Subject
 from app import db
+from app.services.catalog.quiz_payload_service import invalidate_quiz_payload
 
 
 def create_subject(data):
@@ -16,6 +17,10 @@ def update_subject(subject_id, data):
     subject.name = data.get("name", subject.name)
     subject.description = data.get("description", subject.description)
     db.session.commit()
+    # Quiz payloads embed the subject name
+    for chapter in subject.chapters:
+        for quiz in chapter.quizzes:
+            invalidate_quiz_payload(quiz.id)
     return subject
 
 
@@ -1,5 +1,6 @@
 from app.models.user import User
 from app import db
+from app.services.user.identity_service import invalidate_user_identity
 
 
 def get_all_users():
@@ -24,6 +25,7 @@ def block_user(user_id):
         raise Exception("User not found")
     user.is_blocked = True
     db.session.commit()
+    invalidate_user_identity(user_id)
     return user
 
 
@@ -33,4 +35,5 @@ def unblock_user(user_id):
         raise Exception("User not found")
     user.is_blocked = False
     db.session.commit()
+    invalidate_user_identity(user_id)
     return user
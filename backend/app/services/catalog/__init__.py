@@ -2,7 +2,11 @@ from .chapter_service import get_chapter_by_id, get_chapters_by_subject
 from .question_service import get_question_by_id, get_questions_by_quiz
 from .quiz_service import get_quiz_by_id, get_quizzes_by_chapter, get_all_quizzes
 from .subject_service import get_subject_by_id, get_all_subjects
-from .quiz_service import get_leaderboard_by_quiz_id
+from .leaderboard_service import get_leaderboard_by_quiz_id
+from .answer_key_service import get_answer_key, invalidate_answer_key
+from .quiz_payload_service import get_quiz_payload, invalidate_quiz_payload
+from .score_distribution_service import get_score_distribution
+from .scope_leaderboard_service import get_scope_leaderboard
 
 __all__ = [
     "get_chapter_by_id",
@@ -15,4 +19,10 @@ __all__ = [
     "get_all_subjects",
     "get_all_quizzes",
     "get_leaderboard_by_quiz_id",
+    "get_answer_key",
+    "invalidate_answer_key",
+    "get_quiz_payload",
+    "invalidate_quiz_payload",
+    "get_score_distribution",
+    "get_scope_leaderboard",
 ]
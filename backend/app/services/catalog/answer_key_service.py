@@ -0,0 +1,96 @@
+from app import db, cache
+from app.models.question import Question
+from app.models.option import Option
+from app.utils.ttl_cache import TTLCache
+
+ANSWER_KEY_CACHE_KEY = "answer_key:{}"
+ANSWER_KEY_TIMEOUT = 3600
+
+# Per-process copy in front of Redis; entries expire quickly so an admin edit
+# made through another worker is picked up within LOCAL_TTL seconds.
+LOCAL_TTL = 30
+_local_answer_keys = TTLCache(maxsize=256, ttl=LOCAL_TTL)
+
+
+def build_answer_key(quiz_id):
+    """
+    Build the answer key of a quiz from Question/Option:
+
+        {
+            "questions": {question_id: {"max_marks": float, "correct": frozenset}},
+            "options": {option_id: question_id},
+        }
+    """
+    rows = (
+        db.session.query(Question.id, Question.max_marks, Option.id, Option.is_correct)
+        .outerjoin(Option, Option.question_id == Question.id)
+        .filter(Question.quiz_id == quiz_id)
+        .all()
+    )
+    questions = {}
+    options = {}
+    for question_id, max_marks, option_id, is_correct in rows:
+        entry = questions.setdefault(
+            question_id, {"max_marks": max_marks, "correct": set()}
+        )
+        if option_id is not None:
+            options[option_id] = question_id
+            if is_correct:
+                entry["correct"].add(option_id)
+
+    for entry in questions.values():
+        entry["correct"] = frozenset(entry["correct"])
+    return {"questions": questions, "options": options}
+
+
+def get_answer_key(quiz_id, refresh=False):
+    answer_key = None if refresh else _local_answer_keys.get(quiz_id)
+    if answer_key is not None:
+        return answer_key
+
+    answer_key = None if refresh else cache.get(ANSWER_KEY_CACHE_KEY.format(quiz_id))
+    if answer_key is None:
+        answer_key = build_answer_key(quiz_id)
+        cache.set(ANSWER_KEY_CACHE_KEY.format(quiz_id), answer_key, ANSWER_KEY_TIMEOUT)
+    _local_answer_keys.set(quiz_id, answer_key)
+    return answer_key
+
+
+def invalidate_answer_key(quiz_id):
+    cache.delete(ANSWER_KEY_CACHE_KEY.format(quiz_id))
+    _local_answer_keys.delete(quiz_id)
+
+
+def is_correct_answer(answer_key, question_id, option_id):
+    question = answer_key["questions"].get(question_id)
+    return question is not None and option_id in question["correct"]
+
+
+def grade_responses(answer_key, responses):
+    """
+    Summarize an attempt from (question_id, option_id, is_attempted) rows:
+    score, total_questions, max_marks, attempted_count, correct_count and
+    wrong_count.
+    """
+    questions = answer_key["questions"]
+    score = 0.0
+    attempted = correct = wrong = 0
+    for question_id, option_id, is_attempted in responses:
+        if not is_attempted:
+            continue
+        attempted += 1
+        if option_id is None:
+            continue
+        if is_correct_answer(answer_key, question_id, option_id):
+            correct += 1
+            score += questions[question_id]["max_marks"]
+        else:
+            wrong += 1
+    return {
+        "score": float(score),
+        "total_questions": len(questions),
+        "max_marks": float(sum(q["max_marks"] for q in questions.values())),
+        "attempted_count": attempted,
+        "correct_count": correct,
+        "wrong_count": wrong,
+    }
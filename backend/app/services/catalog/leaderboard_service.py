@@ -0,0 +1,453 @@
+import calendar
+import json
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import joinedload
+from app import db, cache
+from app.models.quiz import Quiz
+from app.models.quiz_stats import QuizStats
+from app.models.quiz_attempt import QuizAttempt
+from app.models.chapter import Chapter
+from app.models.user import User
+from app.utils.redis_client import get_redis, rebuild_when_unchanged
+from app.utils.pagination import (
+    encode_cursor,
+    decode_offset_cursor,
+    encode_signed_cursor,
+    decode_signed_cursor,
+)
+
+# Each quiz leaderboard is a Redis sorted set scored by quiz score. Members are
+# "<inverted end time>:<inverted user_id>" so that, among equal scores,
+# ZREVRANGE returns the earliest submission (then the lowest user_id) first.
+# Two hashes map user_id to the member and to the JSON row shown on the board.
+# The ready key marks a board that has been loaded from the database; submits
+# are only recorded into ready boards and a missing board is rebuilt on first
+# read. The counted set holds the ids of the attempts on the board so that a
+# rebuild notices submits recorded while it reads the database. With
+# LEADERBOARD_BACKEND = "sql" the boards are ranked in the database instead
+# and Redis is not used.
+LEADERBOARD_KEY = "leaderboard:quiz:{}"
+LEADERBOARD_MEMBERS_KEY = "leaderboard:quiz:{}:members"
+LEADERBOARD_ENTRIES_KEY = "leaderboard:quiz:{}:entries"
+LEADERBOARD_READY_KEY = "leaderboard:quiz:{}:ready"
+LEADERBOARD_COUNTED_KEY = "leaderboard:quiz:{}:counted"
+
+_MAX_TIMESTAMP_US = 10**17
+_MAX_USER_ID = 10**12
+
+# The attempt is marked even while the board is not loaded, so a rebuild
+# reading the database at the same time sees the change and starts over
+_RECORD_ENTRY = """
+if redis.call('SADD', KEYS[5], ARGV[5]) == 0 then
+    return 0
+end
+if redis.call('EXISTS', KEYS[4]) == 0 then
+    return 0
+end
+local old = redis.call('HGET', KEYS[2], ARGV[1])
+if old then
+    redis.call('ZREM', KEYS[1], old)
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+return 1
+"""
+
+
+def _keys(quiz_id):
+    return [
+        LEADERBOARD_KEY.format(quiz_id),
+        LEADERBOARD_MEMBERS_KEY.format(quiz_id),
+        LEADERBOARD_ENTRIES_KEY.format(quiz_id),
+        LEADERBOARD_READY_KEY.format(quiz_id),
+        LEADERBOARD_COUNTED_KEY.format(quiz_id),
+    ]
+
+
+def _utc_naive(value):
+    # Stored timestamps are naive UTC; normalize aware values the same way
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _member(user_id, end_time):
+    end_time = _utc_naive(end_time)
+    micros = calendar.timegm(end_time.timetuple()) * 10**6 + end_time.microsecond
+    return f"{_MAX_TIMESTAMP_US - micros:017d}:{_MAX_USER_ID - user_id:012d}"
+
+
+def _member_user_id(member):
+    return _MAX_USER_ID - int(member.rsplit(":", 1)[1])
+
+
+def _entry(user_id, username, full_name, score, start_time, end_time, remarks):
+    return {
+        "user_id": user_id,
+        "username": username,
+        "full_name": full_name,
+        "score": score,
+        "start_time": _utc_naive(start_time).isoformat(),
+        "end_time": _utc_naive(end_time).isoformat(),
+        "remarks": remarks,
+    }
+
+
+def record_leaderboard_entry(
+    quiz_id,
+    attempt_id,
+    user_id,
+    username,
+    full_name,
+    score,
+    start_time,
+    end_time,
+    remarks,
+):
+    """
+    Add or replace the leaderboard row of a user after a submit. Boards that
+    were never loaded are left alone; they are built from the database when
+    first read.
+    """
+    entry = _entry(user_id, username, full_name, score, start_time, end_time, remarks)
+    get_redis().register_script(_RECORD_ENTRY)(
+        keys=_keys(quiz_id),
+        args=[
+            user_id,
+            _member(user_id, end_time),
+            score,
+            json.dumps(entry),
+            attempt_id,
+        ],
+    )
+
+
+def rebuild_quiz_leaderboard(quiz_id):
+    """Load the leaderboard of a quiz from its completed attempts."""
+    board_key, members_key, entries_key, ready_key, counted_key = _keys(quiz_id)
+
+    def load():
+        return (
+            db.session.query(
+                QuizAttempt.user_id,
+                User.username,
+                User.full_name,
+                QuizAttempt.score,
+                QuizAttempt.start_time,
+                QuizAttempt.end_time,
+                QuizAttempt.remarks,
+                QuizAttempt.id,
+            )
+            .join(User, User.id == QuizAttempt.user_id)
+            .filter(QuizAttempt.quiz_id == quiz_id, QuizAttempt.in_progress == False)
+            .all()
+        )
+
+    def write(pipe, rows):
+        pipe.delete(board_key, members_key, entries_key, counted_key)
+        if rows:
+            members = {row.user_id: _member(row.user_id, row.end_time) for row in rows}
+            pipe.zadd(board_key, {members[row.user_id]: row.score for row in rows})
+            pipe.hset(members_key, mapping=members)
+            pipe.hset(
+                entries_key,
+                mapping={row.user_id: json.dumps(_entry(*row[:7])) for row in rows},
+            )
+            pipe.sadd(counted_key, *(row.id for row in rows))
+        pipe.set(ready_key, 1)
+
+    # A submit recorded while the attempts are read restarts the rebuild
+    rows = rebuild_when_unchanged([counted_key], load, write)
+    return len(rows)
+
+
+def delete_quiz_leaderboard(quiz_id):
+    if redis_leaderboard_enabled():
+        get_redis().delete(*_keys(quiz_id))
+
+
+def _quiz_info(quiz_id):
+    quiz = Quiz.query.options(joinedload(Quiz.chapter).joinedload(Chapter.subject)).get(
+        quiz_id
+    )
+    if not quiz:
+        return None
+    return {
+        "id": quiz.id,
+        "title": quiz.title,
+        "quiz_date": quiz.quiz_date.isoformat(),
+        "time_duration": quiz.time_duration,
+        "remarks": quiz.remarks,
+        "chapter_name": quiz.chapter.name,
+        "subject_name": quiz.chapter.subject.name,
+    }
+
+
+def redis_leaderboard_enabled():
+    return current_app.config.get("LEADERBOARD_BACKEND", "redis") == "redis"
+
+
+def get_leaderboard_by_quiz_id(
+    quiz_id, offset=0, limit=None, cursor=None, user_id=None
+):
+    """
+    Get leaderboard data for a specific quiz including:
+    - Quiz details with chapter and subject information
+    - One page of completed attempts ranked by score, earliest submit first
+      on ties (the whole board when limit is None), and the cursor of the
+      next page as "next_cursor"
+    - The rank of user_id, when given, as "my_rank"
+    """
+    quiz_info = _quiz_info(quiz_id)
+    if not quiz_info:
+        return None
+
+    if redis_leaderboard_enabled():
+        data = _redis_leaderboard(quiz_id, offset, limit, cursor, user_id)
+    else:
+        data = _sql_leaderboard(quiz_id, offset, limit, cursor, user_id)
+    return {"quiz": quiz_info, **data}
+
+
+def _decode_sql_cursor(cursor):
+    try:
+        score, end_time, user_id, position, rank = decode_signed_cursor(cursor)
+        return (
+            float(score),
+            datetime.fromisoformat(end_time),
+            int(user_id),
+            int(position),
+            int(rank),
+        )
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _redis_leaderboard(quiz_id, offset, limit, cursor, user_id):
+    client = get_redis()
+    board_key, members_key, entries_key, ready_key, _ = _keys(quiz_id)
+    if not client.exists(ready_key):
+        rebuild_quiz_leaderboard(quiz_id)
+
+    if cursor:
+        offset = decode_offset_cursor(cursor)
+    end = -1 if limit is None else offset + limit - 1
+    pipe = client.pipeline(transaction=False)
+    pipe.zrevrange(board_key, offset, end)
+    pipe.zcard(board_key)
+    if user_id is not None:
+        pipe.hget(members_key, user_id)
+    results = pipe.execute()
+    members, total = results[0], results[1]
+
+    user_ids = [_member_user_id(member) for member in members]
+    entries = client.hmget(entries_key, user_ids) if user_ids else []
+    leaderboard_data = []
+    for rank, raw in enumerate(entries, offset + 1):
+        if raw is not None:
+            leaderboard_data.append({"rank": rank, **json.loads(raw)})
+
+    next_cursor = None
+    if limit is not None and offset + limit < total:
+        next_cursor = encode_cursor([offset + limit])
+
+    data = {
+        "leaderboard": leaderboard_data,
+        "total_participants": total,
+        "next_cursor": next_cursor,
+    }
+    if user_id is not None:
+        data["my_rank"] = None
+        my_member = results[2]
+        if my_member is not None:
+            my_rank = client.zrevrank(board_key, my_member)
+            raw = client.hget(entries_key, user_id)
+            if my_rank is not None and raw is not None:
+                data["my_rank"] = {"rank": my_rank + 1, **json.loads(raw)}
+    return data
+
+
+# Leaderboard order; user_id makes it total so keyset pages never overlap.
+# Ranks follow RANK() over score and end time, so attempts submitted at the
+# same moment with the same score share a rank.
+_SQL_ORDER = (
+    QuizAttempt.score.desc(),
+    QuizAttempt.end_time.asc(),
+    QuizAttempt.user_id.asc(),
+)
+LEADERBOARD_RANK_CACHE_KEY = "leaderboard:quiz:{}:rank:{}:{}"
+LEADERBOARD_RANK_TIMEOUT = 300
+
+
+def _sql_entry(rank, row):
+    return {
+        "rank": rank,
+        **_entry(
+            row.user_id,
+            row.username,
+            row.full_name,
+            row.score,
+            row.start_time,
+            row.end_time,
+            row.remarks,
+        ),
+    }
+
+
+def _completed(quiz_id):
+    return and_(QuizAttempt.quiz_id == quiz_id, QuizAttempt.in_progress == False)
+
+
+def _participants(quiz_id):
+    # quiz_stats is updated in the submit transaction, so it matches the table
+    count = (
+        db.session.query(QuizStats.attempt_count).filter_by(quiz_id=quiz_id).scalar()
+    )
+    if count is None:
+        count = (
+            db.session.query(func.count(QuizAttempt.id))
+            .filter(_completed(quiz_id))
+            .scalar()
+        )
+    return count
+
+
+def _rank_of(quiz_id, score, end_time):
+    """
+    RANK() of a score and end time: one more than the attempts strictly ahead
+    of it. This counts index entries up to the rank, so it is only used for
+    offset pages and for the caller's own rank, which is cached.
+    """
+    ahead = (
+        db.session.query(func.count(QuizAttempt.id))
+        .filter(
+            _completed(quiz_id),
+            or_(
+                QuizAttempt.score > score,
+                and_(QuizAttempt.score == score, QuizAttempt.end_time < end_time),
+            ),
+        )
+        .scalar()
+    )
+    return ahead + 1
+
+
+def _sql_leaderboard(quiz_id, offset, limit, cursor, user_id):
+    """
+    Rank one page in the database. The page rows are selected by the keyset
+    filter and limit in a subquery, and RANK() is evaluated over those rows
+    only, on top of the number of rows before the page. A signed cursor
+    carries the sort key, position and rank of the last row served, so rows
+    that tie with it keep its rank; offset only applies without a cursor.
+    """
+    completed = _completed(quiz_id)
+    position = offset or 0
+    page = db.session.query(
+        QuizAttempt.user_id,
+        User.username,
+        User.full_name,
+        QuizAttempt.score,
+        QuizAttempt.start_time,
+        QuizAttempt.end_time,
+        QuizAttempt.remarks,
+    ).join(User, User.id == QuizAttempt.user_id)
+    if cursor:
+        score, end_time, last_user_id, position, last_rank = _decode_sql_cursor(cursor)
+        page = page.filter(
+            or_(
+                QuizAttempt.score < score,
+                and_(QuizAttempt.score == score, QuizAttempt.end_time > end_time),
+                and_(
+                    QuizAttempt.score == score,
+                    QuizAttempt.end_time == end_time,
+                    QuizAttempt.user_id > last_user_id,
+                ),
+            )
+        )
+    page = page.filter(completed).order_by(*_SQL_ORDER)
+    if offset and not cursor:
+        page = page.offset(offset)
+    if limit is not None:
+        page = page.limit(limit + 1)
+    page = page.subquery()
+
+    rank = func.rank().over(order_by=(page.c.score.desc(), page.c.end_time.asc()))
+    rank = rank + position
+    if cursor:
+        # Rows tying with the last row served continue its rank
+        rank = case(
+            (and_(page.c.score == score, page.c.end_time == end_time), last_rank),
+            else_=rank,
+        )
+    rows = (
+        db.session.query(page, rank.label("rank"))
+        .order_by(page.c.score.desc(), page.c.end_time.asc(), page.c.user_id.asc())
+        .all()
+    )
+    ranks = [row.rank for row in rows]
+    if offset and not cursor and rows:
+        # Rows tying with attempts before the offset share their rank
+        first = rows[0]
+        first_rank = _rank_of(quiz_id, first.score, first.end_time)
+        ranks = [
+            (
+                first_rank
+                if (row.score, row.end_time) == (first.score, first.end_time)
+                else rank
+            )
+            for row, rank in zip(rows, ranks)
+        ]
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_signed_cursor(
+            [
+                last.score,
+                last.end_time.isoformat(),
+                last.user_id,
+                position + len(rows),
+                ranks[len(rows) - 1],
+            ]
+        )
+
+    total = _participants(quiz_id)
+    data = {
+        "leaderboard": [_sql_entry(rank, row) for rank, row in zip(ranks, rows)],
+        "total_participants": total,
+        "next_cursor": next_cursor,
+    }
+    if user_id is not None:
+        data["my_rank"] = _sql_user_rank(quiz_id, user_id, completed, total)
+    return data
+
+
+def _sql_user_rank(quiz_id, user_id, completed, total):
+    mine = (
+        db.session.query(
+            QuizAttempt.user_id,
+            User.username,
+            User.full_name,
+            QuizAttempt.score,
+            QuizAttempt.start_time,
+            QuizAttempt.end_time,
+            QuizAttempt.remarks,
+        )
+        .join(User, User.id == QuizAttempt.user_id)
+        .filter(completed, QuizAttempt.user_id == user_id)
+        .first()
+    )
+    if mine is None:
+        return None
+    # Counting the attempts ahead is O(rank), so the rank is cached until the
+    # next submit changes the number of participants
+    key = LEADERBOARD_RANK_CACHE_KEY.format(quiz_id, user_id, total)
+    rank = cache.get(key)
+    if rank is None:
+        rank = _rank_of(quiz_id, mine.score, mine.end_time)
+        cache.set(key, rank, LEADERBOARD_RANK_TIMEOUT)
+    return {"rank": rank, **_entry(*mine)}
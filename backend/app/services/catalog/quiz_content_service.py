@@ -0,0 +1,33 @@
+import time
+from app import cache
+from app.services.catalog.question_service import get_questions_by_quiz
+from app.services.catalog.answer_key_service import invalidate_answer_key
+from app.services.catalog.quiz_payload_service import invalidate_quiz_payload
+
+QUIZ_CONTENT_VERSION_KEY = "quiz_content_version:{}"
+
+
+def get_quiz_content_version_key(quiz_id):
+    return QUIZ_CONTENT_VERSION_KEY.format(quiz_id)
+
+
+def get_quiz_content_version(quiz_id):
+    """
+    Opaque version of a quiz's questions and options, changed on every admin
+    edit. Derived caches store it and are ignored once it moves on. A lost
+    version key simply starts a new version.
+    """
+    key = get_quiz_content_version_key(quiz_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=0)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_quiz_content(quiz_id):
+    """Drop every cache derived from the questions and options of a quiz."""
+    cache.delete_memoized(get_questions_by_quiz, quiz_id)
+    invalidate_answer_key(quiz_id)
+    invalidate_quiz_payload(quiz_id)
+    cache.set(get_quiz_content_version_key(quiz_id), time.time_ns(), timeout=0)
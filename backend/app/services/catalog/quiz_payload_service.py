@@ -0,0 +1,74 @@
+import hashlib
+import json
+from sqlalchemy.orm import joinedload
+from app import cache
+from app.models.quiz import Quiz
+from app.models.chapter import Chapter
+from app.models.question import Question
+
+QUIZ_PAYLOAD_CACHE_KEY = "quiz_payload:{}"
+QUIZ_PAYLOAD_TIMEOUT = 3600
+
+
+def build_quiz_payload(quiz_id):
+    """
+    Serialize the student-facing questions response of a quiz once.
+
+    Returns {"body": bytes, "etag": str} or None when the quiz does not exist.
+    The body never contains is_correct; the etag is a hash of the body.
+    """
+    quiz = Quiz.query.options(joinedload(Quiz.chapter).joinedload(Chapter.subject)).get(
+        quiz_id
+    )
+    if not quiz:
+        return None
+    questions = (
+        Question.query.options(joinedload(Question.options))
+        .filter_by(quiz_id=quiz_id)
+        .all()
+    )
+
+    payload = {
+        "quiz_id": quiz_id,
+        "quiz_details": {
+            "quiz_id": quiz_id,
+            "quiz_title": quiz.title,
+            "quiz_date": quiz.quiz_date.isoformat(),
+            "time_duration": quiz.time_duration,
+            "remarks": quiz.remarks,
+            "chapter_id": quiz.chapter_id,
+            "chapter_name": quiz.chapter.name,
+            "subject_name": quiz.chapter.subject.name,
+        },
+        "questions": [
+            {
+                "id": q.id,
+                "question": q.question,
+                "max_marks": q.max_marks,
+                "options": [
+                    {
+                        "id": opt.id,
+                        "option_text": opt.option_text,
+                    }
+                    for opt in q.options
+                ],
+            }
+            for q in questions
+        ],
+    }
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return {"body": body, "etag": hashlib.sha256(body).hexdigest()}
+
+
+def get_quiz_payload(quiz_id, refresh=False):
+    key = QUIZ_PAYLOAD_CACHE_KEY.format(quiz_id)
+    payload = None if refresh else cache.get(key)
+    if payload is None:
+        payload = build_quiz_payload(quiz_id)
+        if payload is not None:
+            cache.set(key, payload, QUIZ_PAYLOAD_TIMEOUT)
+    return payload
+
+
+def invalidate_quiz_payload(quiz_id):
+    cache.delete(QUIZ_PAYLOAD_CACHE_KEY.format(quiz_id))
@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+from sqlalchemy import and_, case, desc, func, or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.quiz_attempt import QuizAttempt
+from app.models.quiz_stats import QuizStats
+
+
+def record_quiz_stats(quiz_id, user_id, score, end_time, duration_seconds):
+    """
+    Fold one submitted attempt into the stats of its quiz. Stages the change
+    in the current transaction; end_time is naive UTC like stored timestamps.
+    """
+    has_duration = duration_seconds is not None
+    # Earliest submit keeps the top spot on equal scores
+    takes_top = or_(
+        QuizStats.top_score.is_(None),
+        QuizStats.top_score < score,
+        and_(QuizStats.top_score == score, QuizStats.top_end_time > end_time),
+    )
+    values = {
+        QuizStats.attempt_count: QuizStats.attempt_count + 1,
+        QuizStats.score_sum: QuizStats.score_sum + score,
+        QuizStats.score_min: case(
+            (
+                or_(QuizStats.score_min.is_(None), QuizStats.score_min > score),
+                score,
+            ),
+            else_=QuizStats.score_min,
+        ),
+        QuizStats.score_max: case(
+            (
+                or_(QuizStats.score_max.is_(None), QuizStats.score_max < score),
+                score,
+            ),
+            else_=QuizStats.score_max,
+        ),
+        QuizStats.duration_count: QuizStats.duration_count + int(has_duration),
+        QuizStats.duration_sum: QuizStats.duration_sum + (duration_seconds or 0),
+        QuizStats.top_user_id: case((takes_top, user_id), else_=QuizStats.top_user_id),
+        QuizStats.top_score: case((takes_top, score), else_=QuizStats.top_score),
+        QuizStats.top_end_time: case(
+            (takes_top, end_time), else_=QuizStats.top_end_time
+        ),
+        QuizStats.updated_at: datetime.now(timezone.utc),
+    }
+
+    def update():
+        return QuizStats.query.filter_by(quiz_id=quiz_id).update(
+            values, synchronize_session=False
+        )
+
+    if update():
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(
+                QuizStats(
+                    quiz_id=quiz_id,
+                    attempt_count=1,
+                    score_sum=score,
+                    score_min=score,
+                    score_max=score,
+                    duration_count=int(has_duration),
+                    duration_sum=duration_seconds or 0,
+                    top_user_id=user_id,
+                    top_score=score,
+                    top_end_time=end_time,
+                )
+            )
+    except IntegrityError:
+        # Another submit created the row first
+        update()
+
+
+def rebuild_quiz_stats(quiz_id=None):
+    """
+    Recompute quiz_stats from the completed attempts, for every quiz or just
+    quiz_id, and commit. Returns the number of quizzes with stats.
+    """
+    completed = [QuizAttempt.in_progress == False]
+    if quiz_id is not None:
+        completed.append(QuizAttempt.quiz_id == quiz_id)
+
+    totals = (
+        db.session.query(
+            QuizAttempt.quiz_id,
+            func.count(QuizAttempt.id).label("attempt_count"),
+            func.sum(QuizAttempt.score).label("score_sum"),
+            func.min(QuizAttempt.score).label("score_min"),
+            func.max(QuizAttempt.score).label("score_max"),
+            func.count(QuizAttempt.duration_seconds).label("duration_count"),
+            func.sum(QuizAttempt.duration_seconds).label("duration_sum"),
+        )
+        .filter(*completed)
+        .group_by(QuizAttempt.quiz_id)
+        .all()
+    )
+    ranked = (
+        db.session.query(
+            QuizAttempt.quiz_id,
+            QuizAttempt.user_id,
+            QuizAttempt.score,
+            QuizAttempt.end_time,
+            func.row_number()
+            .over(
+                partition_by=QuizAttempt.quiz_id,
+                order_by=(
+                    desc(QuizAttempt.score),
+                    QuizAttempt.end_time,
+                    QuizAttempt.user_id,
+                ),
+            )
+            .label("position"),
+        )
+        .filter(*completed)
+        .subquery()
+    )
+    top = {
+        row.quiz_id: row
+        for row in db.session.query(ranked).filter(ranked.c.position == 1)
+    }
+
+    try:
+        stale = QuizStats.query
+        if quiz_id is not None:
+            stale = stale.filter_by(quiz_id=quiz_id)
+        stale.delete(synchronize_session=False)
+        db.session.add_all(
+            QuizStats(
+                quiz_id=row.quiz_id,
+                attempt_count=row.attempt_count,
+                score_sum=row.score_sum or 0,
+                score_min=row.score_min,
+                score_max=row.score_max,
+                duration_count=row.duration_count,
+                duration_sum=row.duration_sum or 0,
+                top_user_id=top[row.quiz_id].user_id,
+                top_score=top[row.quiz_id].score,
+                top_end_time=top[row.quiz_id].end_time,
+            )
+            for row in totals
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(totals)
+
+
+def delete_quiz_stats(quiz_id):
+    """Stage removal of the stats row of a quiz that is being deleted."""
+    QuizStats.query.filter_by(quiz_id=quiz_id).delete(synchronize_session=False)
@@ -0,0 +1,250 @@
+from sqlalchemy import func
+from app import db
+from app.models.quiz import Quiz
+from app.models.quiz_attempt import QuizAttempt
+from app.models.chapter import Chapter
+from app.models.subject import Subject
+from app.models.user import User
+from app.utils.redis_client import get_redis, rebuild_when_unchanged
+from app.utils.pagination import encode_cursor, decode_offset_cursor
+
+# Chapter and subject leaderboards rank users across all quizzes of the scope
+# by total and by average score. Per scope, two sorted sets (total, average)
+# and a hash of attempt counts are kept in Redis, keyed by a padded inverted
+# user_id so that equal scores list the lowest user_id first. Submits add to
+# the boards of the quiz's chapter and subject; as with quiz leaderboards the
+# ready key marks boards loaded from the database and missing boards are
+# rebuilt on first read. The counted set holds the ids of the attempts on the
+# boards so that an attempt already loaded by a rebuild is not added again by
+# its submit.
+SCOPES = ("chapter", "subject")
+METRICS = ("total", "average")
+SCOPE_BOARD_KEY = "leaderboard:{}:{}:{}"
+SCOPE_ATTEMPTS_KEY = "leaderboard:{}:{}:attempts"
+SCOPE_READY_KEY = "leaderboard:{}:{}:ready"
+SCOPE_COUNTED_KEY = "leaderboard:{}:{}:counted"
+
+_MAX_USER_ID = 10**12
+
+# The attempt is marked even while the boards are not loaded, so a rebuild
+# reading the database at the same time sees the change and starts over
+_RECORD_SCORE = """
+if redis.call('SADD', KEYS[5], ARGV[3]) == 0 then
+    return 0
+end
+if redis.call('EXISTS', KEYS[4]) == 0 then
+    return 0
+end
+local total = tonumber(redis.call('ZINCRBY', KEYS[1], ARGV[2], ARGV[1]))
+local attempts = redis.call('HINCRBY', KEYS[3], ARGV[1], 1)
+redis.call('ZADD', KEYS[2], total / attempts, ARGV[1])
+return attempts
+"""
+
+
+def _keys(scope, scope_id):
+    return [
+        SCOPE_BOARD_KEY.format(scope, scope_id, "total"),
+        SCOPE_BOARD_KEY.format(scope, scope_id, "average"),
+        SCOPE_ATTEMPTS_KEY.format(scope, scope_id),
+        SCOPE_READY_KEY.format(scope, scope_id),
+        SCOPE_COUNTED_KEY.format(scope, scope_id),
+    ]
+
+
+def _member(user_id):
+    return f"{_MAX_USER_ID - user_id:012d}"
+
+
+def _member_user_id(member):
+    return _MAX_USER_ID - int(member)
+
+
+def record_scope_scores(quiz_id, attempt_id, user_id, score):
+    """Add a submitted attempt once to the chapter and subject boards of its quiz."""
+    scope_ids = (
+        db.session.query(Quiz.chapter_id, Chapter.subject_id)
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .filter(Quiz.id == quiz_id)
+        .first()
+    )
+    if scope_ids is None:
+        return
+    script = get_redis().register_script(_RECORD_SCORE)
+    for scope, scope_id in zip(SCOPES, scope_ids):
+        script(keys=_keys(scope, scope_id), args=[_member(user_id), score, attempt_id])
+
+
+def _scope_attempts(query, scope, scope_id):
+    query = query.join(Quiz, Quiz.id == QuizAttempt.quiz_id).filter(
+        QuizAttempt.in_progress == False
+    )
+    if scope == "chapter":
+        return query.filter(Quiz.chapter_id == scope_id)
+    return query.join(Chapter, Chapter.id == Quiz.chapter_id).filter(
+        Chapter.subject_id == scope_id
+    )
+
+
+def rebuild_scope_leaderboard(scope, scope_id):
+    """Load a chapter or subject board from the completed attempts."""
+    total_key, average_key, attempts_key, ready_key, counted_key = _keys(
+        scope, scope_id
+    )
+
+    def load():
+        rows = (
+            _scope_attempts(
+                db.session.query(
+                    QuizAttempt.user_id,
+                    func.sum(QuizAttempt.score).label("total"),
+                    func.count(QuizAttempt.id).label("attempts"),
+                ),
+                scope,
+                scope_id,
+            )
+            .group_by(QuizAttempt.user_id)
+            .all()
+        )
+        attempt_ids = [
+            attempt_id
+            for (attempt_id,) in _scope_attempts(
+                db.session.query(QuizAttempt.id), scope, scope_id
+            )
+        ]
+        return rows, attempt_ids
+
+    def write(pipe, loaded):
+        rows, attempt_ids = loaded
+        pipe.delete(total_key, average_key, attempts_key, counted_key)
+        if rows:
+            pipe.zadd(total_key, {_member(r.user_id): r.total for r in rows})
+            pipe.zadd(
+                average_key, {_member(r.user_id): r.total / r.attempts for r in rows}
+            )
+            pipe.hset(
+                attempts_key, mapping={_member(r.user_id): r.attempts for r in rows}
+            )
+        if attempt_ids:
+            pipe.sadd(counted_key, *attempt_ids)
+        pipe.set(ready_key, 1)
+
+    # A submit recorded while the attempts are read restarts the rebuild
+    rows, _ = rebuild_when_unchanged([counted_key], load, write)
+    return len(rows)
+
+
+def invalidate_scope_leaderboards(chapter_id):
+    """Drop the boards of a chapter and its subject so they are rebuilt."""
+    chapter = Chapter.query.get(chapter_id)
+    keys = _keys("chapter", chapter_id)
+    if chapter is not None:
+        keys += _keys("subject", chapter.subject_id)
+    get_redis().delete(*keys)
+
+
+def _scope_info(scope, scope_id):
+    if scope == "chapter":
+        chapter = Chapter.query.get(scope_id)
+        if not chapter:
+            return None
+        return {
+            "type": scope,
+            "id": chapter.id,
+            "name": chapter.name,
+            "subject_id": chapter.subject_id,
+            "subject_name": chapter.subject.name,
+        }
+    subject = Subject.query.get(scope_id)
+    if not subject:
+        return None
+    return {"type": scope, "id": subject.id, "name": subject.name}
+
+
+def get_scope_leaderboard(
+    scope, scope_id, metric="total", offset=0, limit=None, cursor=None, user_id=None
+):
+    """
+    Users ranked by their total or average score over the quizzes of a
+    chapter or subject, one page at a time, with the rank of user_id as
+    "my_rank". Returns None when the chapter or subject does not exist.
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of: {', '.join(SCOPES)}")
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(METRICS)}")
+    scope_info = _scope_info(scope, scope_id)
+    if not scope_info:
+        return None
+
+    client = get_redis()
+    total_key, average_key, attempts_key, ready_key, _ = _keys(scope, scope_id)
+    if not client.exists(ready_key):
+        rebuild_scope_leaderboard(scope, scope_id)
+    board_key = total_key if metric == "total" else average_key
+
+    if cursor:
+        offset = decode_offset_cursor(cursor)
+    end = -1 if limit is None else offset + limit - 1
+    pipe = client.pipeline(transaction=False)
+    pipe.zrevrange(board_key, offset, end, withscores=True)
+    pipe.zcard(board_key)
+    if user_id is not None:
+        pipe.zrevrank(board_key, _member(user_id))
+        pipe.zscore(board_key, _member(user_id))
+        pipe.hget(attempts_key, _member(user_id))
+    results = pipe.execute()
+    page, total = results[0], results[1]
+
+    members = [member for member, _ in page]
+    attempts = client.hmget(attempts_key, members) if members else []
+    user_ids = [_member_user_id(member) for member in members]
+    if user_id is not None and results[2] is not None:
+        user_ids.append(user_id)
+    users = {
+        u.id: u
+        for u in db.session.query(User.id, User.username, User.full_name).filter(
+            User.id.in_(user_ids)
+        )
+    }
+
+    def entry(rank, uid, value, count):
+        count = int(count or 0)
+        total_score = value if metric == "total" else value * count
+        user = users.get(uid)
+        return {
+            "rank": rank,
+            "user_id": uid,
+            "username": user.username if user else None,
+            "full_name": user.full_name if user else None,
+            "total_score": round(total_score, 4),
+            "attempts": count,
+            "average_score": round(total_score / count, 4) if count else 0,
+        }
+
+    leaderboard_data = [
+        entry(rank, uid, value, count)
+        for rank, (uid, (_, value), count) in enumerate(
+            zip(user_ids, page, attempts), offset + 1
+        )
+    ]
+
+    next_cursor = None
+    if limit is not None and offset + limit < total:
+        next_cursor = encode_cursor([offset + limit])
+
+    data = {
+        "scope": scope_info,
+        "metric": metric,
+        "leaderboard": leaderboard_data,
+        "total_participants": total,
+        "next_cursor": next_cursor,
+    }
+    if user_id is not None:
+        my_rank, my_value, my_attempts = results[2:5]
+        data["my_rank"] = (
+            entry(my_rank + 1, user_id, my_value, my_attempts)
+            if my_rank is not None
+            else None
+        )
+    return data
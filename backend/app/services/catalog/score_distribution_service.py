@@ -0,0 +1,157 @@
+from app import db
+from app.models.quiz_attempt import QuizAttempt
+from app.services.catalog.answer_key_service import get_answer_key
+from app.utils.redis_client import get_redis, rebuild_when_unchanged
+
+# Score distribution of a quiz as a fixed-bin histogram over the percentage of
+# max marks, one Redis hash per quiz (bin index -> attempts). Submits add one
+# to their bin, so a request reads HISTOGRAM_BINS counters whatever the number
+# of attempts; histograms of several quizzes merge by adding the counts. As
+# with leaderboards, the ready key marks a histogram loaded from the database
+# and submits are only recorded into ready histograms. The counted set holds
+# the ids of the attempts in the histogram so that an attempt already loaded
+# by a rebuild is not added again by its submit.
+SCORE_HISTOGRAM_KEY = "score_histogram:quiz:{}"
+SCORE_HISTOGRAM_READY_KEY = "score_histogram:quiz:{}:ready"
+SCORE_HISTOGRAM_COUNTED_KEY = "score_histogram:quiz:{}:counted"
+HISTOGRAM_BINS = 20
+BIN_WIDTH_PERCENT = 100 / HISTOGRAM_BINS
+PERCENTILES = (10, 50, 90)
+
+# The attempt is marked even while the histogram is not loaded, so a rebuild
+# reading the database at the same time sees the change and starts over
+_RECORD_SCORE = """
+if redis.call('SADD', KEYS[3], ARGV[2]) == 0 then
+    return 0
+end
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return 0
+end
+return redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+"""
+
+
+def _keys(quiz_id):
+    return [
+        SCORE_HISTOGRAM_KEY.format(quiz_id),
+        SCORE_HISTOGRAM_READY_KEY.format(quiz_id),
+        SCORE_HISTOGRAM_COUNTED_KEY.format(quiz_id),
+    ]
+
+
+def score_bin(score, max_marks):
+    """Histogram bin of a score; full marks fall into the last bin."""
+    if not max_marks or max_marks <= 0:
+        return 0
+    fraction = min(max(score / max_marks, 0.0), 1.0)
+    return min(int(fraction * HISTOGRAM_BINS), HISTOGRAM_BINS - 1)
+
+
+def record_score(quiz_id, attempt_id, score, max_marks):
+    """Count a submitted attempt once in the histogram of its quiz."""
+    get_redis().register_script(_RECORD_SCORE)(
+        keys=_keys(quiz_id), args=[score_bin(score, max_marks), attempt_id]
+    )
+
+
+def _quiz_max_marks(quiz_id):
+    # For attempts submitted before max_marks was stored on them
+    return sum(q["max_marks"] for q in get_answer_key(quiz_id)["questions"].values())
+
+
+def rebuild_score_histogram(quiz_id):
+    """Load the histogram of a quiz from its completed attempts."""
+    quiz_max_marks = _quiz_max_marks(quiz_id)
+    histogram_key, ready_key, counted_key = _keys(quiz_id)
+
+    def load():
+        counts = [0] * HISTOGRAM_BINS
+        attempt_ids = []
+        rows = db.session.query(
+            QuizAttempt.id, QuizAttempt.score, QuizAttempt.max_marks
+        ).filter(QuizAttempt.quiz_id == quiz_id, QuizAttempt.in_progress == False)
+        for attempt_id, score, max_marks in rows:
+            counts[
+                score_bin(score, quiz_max_marks if max_marks is None else max_marks)
+            ] += 1
+            attempt_ids.append(attempt_id)
+        return counts, attempt_ids
+
+    def write(pipe, loaded):
+        counts, attempt_ids = loaded
+        pipe.delete(histogram_key, counted_key)
+        pipe.hset(histogram_key, mapping=dict(enumerate(counts)))
+        if attempt_ids:
+            pipe.sadd(counted_key, *attempt_ids)
+        pipe.set(ready_key, 1)
+
+    # A submit recorded while the attempts are read restarts the rebuild
+    counts, _ = rebuild_when_unchanged([counted_key], load, write)
+    return sum(counts)
+
+
+def delete_score_histogram(quiz_id):
+    get_redis().delete(*_keys(quiz_id))
+
+
+def _percentile(counts, total, percentile):
+    """Percentage of max marks below which percentile% of attempts fall."""
+    target = total * percentile / 100
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= target:
+            # Spread the attempts of a bin evenly across its width
+            return round((index + (target - seen) / count) * BIN_WIDTH_PERCENT, 2)
+        seen += count
+    return 100.0
+
+
+def get_score_distribution(quiz_id, user_id=None):
+    """
+    Histogram of the completed attempts of a quiz, p10/p50/p90 as percentages
+    of max marks and, for user_id, the share of attempts that scored lower.
+    """
+    client = get_redis()
+    histogram_key, ready_key, _ = _keys(quiz_id)
+    if not client.exists(ready_key):
+        rebuild_score_histogram(quiz_id)
+
+    raw = client.hgetall(histogram_key)
+    counts = [int(raw.get(str(index), 0)) for index in range(HISTOGRAM_BINS)]
+    total = sum(counts)
+
+    data = {
+        "quiz_id": quiz_id,
+        "total_attempts": total,
+        "bin_width_percent": BIN_WIDTH_PERCENT,
+        "histogram": [
+            {
+                "from_percent": index * BIN_WIDTH_PERCENT,
+                "to_percent": (index + 1) * BIN_WIDTH_PERCENT,
+                "count": count,
+            }
+            for index, count in enumerate(counts)
+        ],
+        "percentiles": {
+            f"p{p}": _percentile(counts, total, p) if total else None
+            for p in PERCENTILES
+        },
+    }
+
+    if user_id is not None:
+        data["my_score"] = data["my_percentile"] = None
+        mine = (
+            db.session.query(QuizAttempt.score, QuizAttempt.max_marks)
+            .filter_by(user_id=user_id, quiz_id=quiz_id, in_progress=False)
+            .first()
+        )
+        if mine is not None and total:
+            max_marks = mine.max_marks
+            if max_marks is None:
+                max_marks = _quiz_max_marks(quiz_id)
+            index = score_bin(mine.score, max_marks)
+            # Attempts in the same bin count as half below, half above
+            below = sum(counts[:index]) + counts[index] / 2
+            data["my_score"] = mine.score
+            data["my_percentile"] = round(below / total * 100, 2)
+    return data
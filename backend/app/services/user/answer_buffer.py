@@ -0,0 +1,100 @@
+from flask import current_app
+from app import db
+from app.utils.redis_client import get_redis
+
+# Answers of an in-progress attempt live in one Redis hash per attempt
+# (question_id -> option_id, "" meaning the answer was cleared) until they are
+# flushed to UserResponse. Attempts with unflushed answers are tracked in a set
+# so the periodic checkpoint knows what to flush.
+ANSWERS_KEY = "quiz:attempt:{}:answers"
+FLUSH_LOCK_KEY = "quiz:attempt:{}:flush_lock"
+DIRTY_ATTEMPTS_KEY = "quiz:attempt:dirty"
+CLEARED = ""
+
+# Remove only the fields that still hold the flushed value, so answers that
+# arrive while a flush is running stay buffered for the next one.
+_RELEASE_FLUSHED = """
+for i = 1, #ARGV - 1, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+if redis.call('HLEN', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[#ARGV])
+end
+return redis.call('HLEN', KEYS[1])
+"""
+
+
+def write_behind_enabled():
+    return current_app.config.get("ANSWER_WRITE_BEHIND", False)
+
+
+def buffer_answers(attempt_id, selections):
+    """Store {question_id: option_id or None} for an attempt in Redis."""
+    if not selections:
+        return
+    key = ANSWERS_KEY.format(attempt_id)
+    mapping = {
+        str(qid): CLEARED if oid is None else str(oid)
+        for qid, oid in selections.items()
+    }
+    pipe = get_redis().pipeline()
+    pipe.hset(key, mapping=mapping)
+    pipe.expire(key, current_app.config["ANSWER_BUFFER_TTL"])
+    pipe.sadd(DIRTY_ATTEMPTS_KEY, attempt_id)
+    pipe.execute()
+
+
+def get_buffered_answers(attempt_id):
+    """Return the unflushed {question_id: option_id or None} of an attempt."""
+    raw = get_redis().hgetall(ANSWERS_KEY.format(attempt_id))
+    return {int(qid): None if oid == CLEARED else int(oid) for qid, oid in raw.items()}
+
+
+def flush_answers(attempt_id, apply_selections):
+    """
+    Write the buffered answers of an attempt to the database.
+
+    apply_selections(attempt_id, selections) stages the upserts; this function
+    commits them and then drops the flushed fields from the buffer. Returns the
+    number of answers flushed.
+    """
+    client = get_redis()
+    key = ANSWERS_KEY.format(attempt_id)
+    lock = client.lock(
+        FLUSH_LOCK_KEY.format(attempt_id), timeout=30, blocking_timeout=10
+    )
+    with lock:
+        raw = client.hgetall(key)
+        if not raw:
+            client.srem(DIRTY_ATTEMPTS_KEY, attempt_id)
+            return 0
+
+        selections = {
+            int(qid): None if oid == CLEARED else int(oid) for qid, oid in raw.items()
+        }
+        try:
+            apply_selections(attempt_id, selections)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        args = [value for pair in raw.items() for value in pair]
+        client.register_script(_RELEASE_FLUSHED)(
+            keys=[key, DIRTY_ATTEMPTS_KEY], args=args + [attempt_id]
+        )
+        return len(selections)
+
+
+def discard_answers(attempt_id):
+    """Drop the buffer of an attempt that can no longer take answers."""
+    pipe = get_redis().pipeline()
+    pipe.delete(ANSWERS_KEY.format(attempt_id))
+    pipe.srem(DIRTY_ATTEMPTS_KEY, attempt_id)
+    pipe.execute()
+
+
+def get_dirty_attempt_ids():
+    return [int(a) for a in get_redis().smembers(DIRTY_ATTEMPTS_KEY)]
@@ -0,0 +1,141 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import EmailDelivery
+
+
+def _now():
+    # Stored timestamps are naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _run(kind, period):
+    return [EmailDelivery.kind == kind, EmailDelivery.period == period]
+
+
+def sent_user_ids(kind, period):
+    """Query of the ids of the users whose email of the run was sent."""
+    return db.session.query(EmailDelivery.user_id).filter(
+        *_run(kind, period), EmailDelivery.status == "sent"
+    )
+
+
+def claim_deliveries(kind, period, user_ids):
+    """
+    Claim the emails of a run for user_ids and commit. Users already sent
+    to, or being sent to by another task whose claim has not gone stale,
+    are left out. Returns (claim_token, ids of the claimed users).
+    """
+    token = str(uuid.uuid4())
+    if not user_ids:
+        return token, set()
+    now = _now()
+
+    known = {
+        user_id
+        for (user_id,) in db.session.query(EmailDelivery.user_id).filter(
+            *_run(kind, period), EmailDelivery.user_id.in_(user_ids)
+        )
+    }
+    missing = [user_id for user_id in user_ids if user_id not in known]
+    if missing:
+        try:
+            with db.session.begin_nested():
+                db.session.add_all(
+                    EmailDelivery(user_id=user_id, kind=kind, period=period)
+                    for user_id in missing
+                )
+        except IntegrityError:
+            # An overlapping run added some of them first; add the rest
+            for user_id in missing:
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(
+                            EmailDelivery(user_id=user_id, kind=kind, period=period)
+                        )
+                except IntegrityError:
+                    pass
+
+    stale = now - timedelta(seconds=current_app.config["MAIL_CLAIM_TIMEOUT_SECONDS"])
+    EmailDelivery.query.filter(
+        *_run(kind, period),
+        EmailDelivery.user_id.in_(user_ids),
+        EmailDelivery.status != "sent",
+        or_(EmailDelivery.claim_token.is_(None), EmailDelivery.claimed_at < stale),
+    ).update(
+        {
+            EmailDelivery.claim_token: token,
+            EmailDelivery.claimed_at: now,
+            EmailDelivery.attempts: EmailDelivery.attempts + 1,
+        },
+        synchronize_session=False,
+    )
+    db.session.commit()
+
+    claimed = {
+        user_id
+        for (user_id,) in db.session.query(EmailDelivery.user_id).filter(
+            *_run(kind, period), EmailDelivery.claim_token == token
+        )
+    }
+    return token, claimed
+
+
+def record_deliveries(kind, period, token, sent_ids, failed=None):
+    """
+    Mark the claimed emails of sent_ids as sent and those of failed
+    ({user_id: error}) as failed, and commit. Both drop out of the claim;
+    the rest of it is kept until release_deliveries.
+    """
+    failed = failed or {}
+    claimed = [*_run(kind, period), EmailDelivery.claim_token == token]
+    try:
+        if sent_ids:
+            EmailDelivery.query.filter(
+                *claimed, EmailDelivery.user_id.in_(sent_ids)
+            ).update(
+                {
+                    EmailDelivery.status: "sent",
+                    EmailDelivery.sent_at: _now(),
+                    EmailDelivery.error: None,
+                    EmailDelivery.claim_token: None,
+                },
+                synchronize_session=False,
+            )
+        for user_id, error in failed.items():
+            EmailDelivery.query.filter(
+                *claimed, EmailDelivery.user_id == user_id
+            ).update(
+                {
+                    EmailDelivery.status: "failed",
+                    EmailDelivery.error: error,
+                    EmailDelivery.claim_token: None,
+                },
+                synchronize_session=False,
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def release_deliveries(kind, period, token, keep_ids=None):
+    """
+    Give up what is left of a claim, e.g. after rendering failed, so a later
+    run can claim those users without waiting for the claim to go stale.
+    Users in keep_ids stay claimed, e.g. those mailed but not yet recorded.
+    """
+    claimed = [*_run(kind, period), EmailDelivery.claim_token == token]
+    if keep_ids:
+        claimed.append(EmailDelivery.user_id.notin_(keep_ids))
+    try:
+        EmailDelivery.query.filter(*claimed).update(
+            {EmailDelivery.claim_token: None}, synchronize_session=False
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,39 @@
+from app.models.user import User
+from app.utils.ttl_cache import TTLCache
+
+# Per-process cache of the user row for handlers that need more than the id
+# carried in the JWT; block/unblock invalidate it, and the TTL bounds how long
+# another worker can serve a stale copy.
+IDENTITY_TTL = 60
+_identities = TTLCache(maxsize=4096, ttl=IDENTITY_TTL)
+
+
+def get_user_identity(user_id):
+    identity = _identities.get(user_id)
+    if identity is not None:
+        return identity
+
+    user = User.query.get(user_id)
+    if not user:
+        return None
+    identity = {
+        "id": user.id,
+        "username": user.username,
+        "full_name": user.full_name,
+        "email": user.email,
+        "date_of_birth": user.date_of_birth,
+        "is_admin": bool(user.is_admin),
+        "is_blocked": bool(user.is_blocked),
+    }
+    _identities.set(user_id, identity)
+    return identity
+
+
+def invalidate_user_identity(user_id):
+    _identities.delete(user_id)
+
+
+def get_user_id_by_username(username):
+    """Lookup for tokens issued before the user_id claim was added."""
+    user = User.query.filter_by(username=username).first()
+    return user.id if user else None
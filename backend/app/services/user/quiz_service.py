@@ -1,7 +1,36 @@
 from datetime import datetime, timezone
-from app import db
-from app.services.catalog import get_questions_by_quiz
-from app.models import Chapter, Quiz, Question, QuizAttempt, Option, UserResponse
+from sqlalchemy import and_, insert, or_
+from app import db, cache
+from app.services.catalog import get_questions_by_quiz, get_answer_key
+from app.services.catalog.answer_key_service import (
+    is_correct_answer,
+    grade_responses,
+)
+from app.models import Chapter, Quiz, QuizAttempt, UserResponse
+from app.models import Subject
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.services.catalog.quiz_content_service import (
+    get_quiz_content_version,
+    get_quiz_content_version_key,
+)
+from app.services.catalog.quiz_stats_service import record_quiz_stats
+from app.services.catalog.score_distribution_service import record_score
+from app.services.catalog.scope_leaderboard_service import record_scope_scores
+from app.services.catalog.leaderboard_service import (
+    record_leaderboard_entry,
+    redis_leaderboard_enabled,
+)
+from app.services.user.identity_service import get_user_identity
+from app.services.user.user_stats_service import record_user_stats
+from app.services.user.answer_buffer import (
+    write_behind_enabled,
+    buffer_answers,
+    get_buffered_answers,
+    flush_answers,
+)
+
+QUIZ_RESULT_CACHE_KEY = "quiz_result:{}:{}"
+QUIZ_RESULT_TIMEOUT = 60 * 60 * 24 * 7
 
 
 def create_quiz_attempt(user_id, quiz_id):
@@ -46,15 +75,44 @@ def get_user_responses(user_id, quiz_id):
     active_attempt = get_active_attempt(user_id, quiz_id)
     if not active_attempt:
         return None
-    return UserResponse.query.filter_by(attempt_id=active_attempt.id).all()
+    responses = UserResponse.query.filter_by(attempt_id=active_attempt.id).all()
+    if not write_behind_enabled():
+        return responses
+
+    # Buffered answers are newer than the persisted ones
+    buffered = get_buffered_answers(active_attempt.id)
+    merged = [r for r in responses if r.question_id not in buffered]
+    for question_id, option_id in buffered.items():
+        if option_id is not None:
+            merged.append(
+                UserResponse(
+                    attempt_id=active_attempt.id,
+                    question_id=question_id,
+                    option_id=option_id,
+                    is_attempted=True,
+                )
+            )
+    return merged
 
 
 def save_user_response(user_id, quiz_id, question_id, selected_option_id):
+    if write_behind_enabled():
+        save_user_responses(
+            user_id,
+            quiz_id,
+            [{"question_id": question_id, "selected_option_id": selected_option_id}],
+        )
+        return None
+
     try:
         # Get active attempt for this quiz
         attempt = get_active_attempt(user_id, quiz_id)
         if not attempt or not attempt.in_progress:
             raise ValueError("No active quiz attempt found")
+        _validate_answers(
+            quiz_id,
+            [{"question_id": question_id, "selected_option_id": selected_option_id}],
+        )
 
         # Check if response exists and update, or create new
         user_response = UserResponse.query.filter_by(
@@ -86,20 +144,190 @@ def save_user_response(user_id, quiz_id, question_id, selected_option_id):
         raise e
 
 
+def _is_id(value):
+    # bool is an int subclass, but true/false are not ids
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _validate_answers(quiz_id, answers):
+    """Return {question_id: option_id} after checking every pair belongs to the quiz."""
+    selections = {}
+    for answer in answers:
+        if (
+            not isinstance(answer, dict)
+            or "question_id" not in answer
+            or "selected_option_id" not in answer
+        ):
+            raise ValueError("Each answer needs question_id and selected_option_id")
+        question_id = answer["question_id"]
+        option_id = answer["selected_option_id"]
+        if not _is_id(question_id) or not (option_id is None or _is_id(option_id)):
+            raise ValueError(
+                "question_id must be an integer and selected_option_id an "
+                "integer or null"
+            )
+        selections[question_id] = option_id
+
+    answer_key = get_answer_key(quiz_id)
+    for question_id, option_id in selections.items():
+        if question_id not in answer_key["questions"]:
+            raise ValueError("Question does not belong to this quiz")
+        if (
+            option_id is not None
+            and answer_key["options"].get(option_id) != question_id
+        ):
+            raise ValueError("Option does not belong to the question")
+    return selections
+
+
+def _apply_selections(attempt_id, selections):
+    """Stage upserts of {question_id: option_id or None} without committing."""
+    existing = {
+        r.question_id: r
+        for r in UserResponse.query.filter(
+            UserResponse.attempt_id == attempt_id,
+            UserResponse.question_id.in_(selections.keys()),
+        )
+    }
+    new_rows = []
+    for question_id, option_id in selections.items():
+        user_response = existing.get(question_id)
+        if option_id is None:
+            if user_response:
+                db.session.delete(user_response)
+        elif user_response:
+            user_response.option_id = option_id
+            user_response.is_attempted = True
+        else:
+            new_rows.append(
+                {
+                    "attempt_id": attempt_id,
+                    "question_id": question_id,
+                    "option_id": option_id,
+                    "is_attempted": True,
+                }
+            )
+
+    # executemany insert instead of one INSERT per new answer
+    if new_rows:
+        db.session.execute(insert(UserResponse), new_rows)
+
+
+def save_user_responses(user_id, quiz_id, answers):
+    """
+    Upsert a batch of answers for the active attempt in a single transaction.
+
+    answers is a list of {"question_id", "selected_option_id"} dicts; a
+    selected_option_id of None clears the saved answer. When a question
+    appears more than once the last entry wins. With ANSWER_WRITE_BEHIND
+    enabled the answers are buffered in Redis instead.
+    """
+    try:
+        attempt = get_active_attempt(user_id, quiz_id)
+        if not attempt or not attempt.in_progress:
+            raise ValueError("No active quiz attempt found")
+        if not answers:
+            return 0
+
+        selections = _validate_answers(quiz_id, answers)
+
+        if write_behind_enabled():
+            buffer_answers(attempt.id, selections)
+            return len(selections)
+
+        _apply_selections(attempt.id, selections)
+        db.session.commit()
+        return len(selections)
+    except Exception as e:
+        db.session.rollback()
+        raise e
+
+
+def flush_buffered_answers(attempt_id):
+    """Persist the Redis-buffered answers of an attempt to UserResponse."""
+    return flush_answers(attempt_id, _apply_selections)
+
+
+def elapsed_seconds(start_time, end_time):
+    """Seconds between two timestamps; naive values are taken as UTC."""
+    if start_time is None or end_time is None:
+        return None
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+    if end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+    return (end_time - start_time).total_seconds()
+
+
 def close_quiz_attempt(user_id, quiz_id):
     try:
         attempt = get_active_attempt(user_id, quiz_id)
         if not attempt:
             raise ValueError("No active attempt found")
 
-        attempt.in_progress = False
-        score = 0
-        for res in attempt.responses:
-            if res.option.is_correct:
-                score += res.question.max_marks
-        attempt.score = score
-        attempt.end_time = datetime.now(timezone.utc)
+        if write_behind_enabled():
+            flush_buffered_answers(attempt.id)
+
+        responses = db.session.query(
+            UserResponse.question_id, UserResponse.option_id, UserResponse.is_attempted
+        ).filter(UserResponse.attempt_id == attempt.id)
+        summary = grade_responses(get_answer_key(quiz_id), responses)
+        end_time = datetime.now(timezone.utc)
+        duration_seconds = elapsed_seconds(attempt.start_time, end_time)
+
+        # Close in one guarded UPDATE so a double submit cannot close the
+        # attempt twice. The summary is stored with it since completed
+        # attempts never change.
+        closed = QuizAttempt.query.filter_by(id=attempt.id, in_progress=True).update(
+            {
+                **summary,
+                "in_progress": False,
+                "end_time": end_time,
+                "duration_seconds": duration_seconds,
+            },
+            synchronize_session=False,
+        )
+        if not closed:
+            raise ValueError("No active attempt found")
+        record_quiz_stats(
+            quiz_id,
+            user_id,
+            summary["score"],
+            end_time.replace(tzinfo=None),
+            duration_seconds,
+        )
+        record_user_stats(user_id, quiz_id, summary, end_time, duration_seconds)
         db.session.commit()
+        if redis_leaderboard_enabled():
+            try:
+                user = get_user_identity(user_id)
+                record_leaderboard_entry(
+                    quiz_id,
+                    attempt.id,
+                    user_id,
+                    user["username"],
+                    user["full_name"],
+                    summary["score"],
+                    attempt.start_time,
+                    end_time,
+                    attempt.remarks,
+                )
+            except Exception as e:
+                # The board is rebuilt from the database by the rebuild script
+                print(f"Failed to update leaderboard of quiz {quiz_id}: {e}")
+        try:
+            record_score(quiz_id, attempt.id, summary["score"], summary["max_marks"])
+        except Exception as e:
+            print(f"Failed to update score histogram of quiz {quiz_id}: {e}")
+        try:
+            record_scope_scores(quiz_id, attempt.id, user_id, summary["score"])
+        except Exception as e:
+            print(f"Failed to update chapter/subject leaderboards: {e}")
+        try:
+            # Result pages right after a submit storm become cache reads
+            cache_quiz_result(attempt)
+        except Exception as e:
+            print(f"Failed to cache result of attempt {attempt.id}: {e}")
         return attempt
     except Exception as e:
         db.session.rollback()
@@ -121,20 +349,22 @@ def get_quiz_score(user_id, quiz_id):
     }
 
 
-def get_full_quiz_result(user_id, quiz_id):
-    last_attempt = (
-        QuizAttempt.query.filter_by(user_id=user_id, quiz_id=quiz_id, in_progress=False)
-        .order_by(QuizAttempt.end_time.desc())
-        .first()
-    )
-    if not last_attempt:
-        raise ValueError("No attempt found")
+def _quiz_result_key(user_id, quiz_id):
+    # A user has at most one attempt per quiz (unique_user_quiz_attempt)
+    return QUIZ_RESULT_CACHE_KEY.format(quiz_id, user_id)
+
+
+def build_quiz_result(attempt):
+    quiz_id = attempt.quiz_id
+    answer_key = get_answer_key(quiz_id)
     responses = {}
-    for res in last_attempt.responses:
-        responses[res.question_id] = {
-            "question_id": res.question_id,
-            "selected_option_id": res.option_id,
-            "is_correct": res.option.is_correct,
+    for question_id, option_id in db.session.query(
+        UserResponse.question_id, UserResponse.option_id
+    ).filter(UserResponse.attempt_id == attempt.id):
+        responses[question_id] = {
+            "question_id": question_id,
+            "selected_option_id": option_id,
+            "is_correct": is_correct_answer(answer_key, question_id, option_id),
         }
     questions = []
     for q in get_questions_by_quiz(quiz_id):
@@ -147,7 +377,7 @@ def get_full_quiz_result(user_id, quiz_id):
                     {
                         "option_id": opt.id,
                         "option_text": opt.option_text,
-                        "is_correct": opt.is_correct,
+                        "is_correct": is_correct_answer(answer_key, q.id, opt.id),
                         "is_selected": (
                             False
                             if q.id not in responses
@@ -165,85 +395,126 @@ def get_full_quiz_result(user_id, quiz_id):
         )
 
     result = {
-        "attempt_id": last_attempt.id,
-        "user_id": last_attempt.user_id,
-        "quiz_id": last_attempt.quiz_id,
-        "start_time": last_attempt.start_time.isoformat(),
-        "end_time": last_attempt.end_time.isoformat(),
-        "score": last_attempt.score,
-        "remarks": last_attempt.remarks,
+        "attempt_id": attempt.id,
+        "user_id": attempt.user_id,
+        "quiz_id": attempt.quiz_id,
+        "start_time": attempt.start_time.isoformat(),
+        "end_time": attempt.end_time.isoformat(),
+        "score": attempt.score,
+        "remarks": attempt.remarks,
         "responses": questions,
     }
     return result
 
 
-def get_user_quiz_history(user_id):
+def cache_quiz_result(attempt):
+    """Render the result of a completed attempt and store it in the cache."""
+    # Read the version first so an edit made while rendering invalidates it
+    version = get_quiz_content_version(attempt.quiz_id)
+    result = build_quiz_result(attempt)
+    cache.set(
+        _quiz_result_key(attempt.user_id, attempt.quiz_id),
+        {"version": version, "result": result},
+        QUIZ_RESULT_TIMEOUT,
+    )
+    return result
+
 
-    attempts = (
-        QuizAttempt.query.filter_by(user_id=user_id, in_progress=False)
+def get_full_quiz_result(user_id, quiz_id):
+    # One round trip for both the cached result and the current quiz version
+    cached, version = cache.get_many(
+        _quiz_result_key(user_id, quiz_id), get_quiz_content_version_key(quiz_id)
+    )
+    if cached and version is not None and cached["version"] == version:
+        return cached["result"]
+
+    last_attempt = (
+        QuizAttempt.query.filter_by(user_id=user_id, quiz_id=quiz_id, in_progress=False)
         .order_by(QuizAttempt.end_time.desc())
-        .all()
+        .first()
+    )
+    if not last_attempt:
+        raise ValueError("No attempt found")
+    return cache_quiz_result(last_attempt)
+
+
+def _user_history_query(user_id):
+    """
+    One statement returning every completed attempt of a user with its quiz,
+    chapter and subject. Counts come from the summary stored on the attempt.
+    """
+    return (
+        db.session.query(
+            QuizAttempt,
+            Quiz,
+            Chapter.name.label("chapter_name"),
+            Subject.name.label("subject_name"),
+        )
+        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .join(Subject, Subject.id == Chapter.subject_id)
+        .filter(QuizAttempt.user_id == user_id, QuizAttempt.in_progress == False)
+        .order_by(QuizAttempt.end_time.desc(), QuizAttempt.id.desc())
     )
 
-    history = []
 
-    for attempt in attempts:
-        # Get quiz details with eager loading to minimize DB queries
-        quiz = (
-            Quiz.query.options(db.joinedload(Quiz.chapter).joinedload(Chapter.subject))
-            .filter_by(id=attempt.quiz_id)
-            .first()
-        )
+def _history_item(row):
+    attempt, quiz = row.QuizAttempt, row.Quiz
+    total_questions = attempt.total_questions or 0
+    attempted_count = attempt.attempted_count or 0
+    return {
+        # Quiz details
+        "quiz_id": quiz.id,
+        "subject_name": row.subject_name,
+        "chapter_name": row.chapter_name,
+        "quiz_title": quiz.title,
+        "quiz_date": quiz.quiz_date.isoformat() if quiz.quiz_date else None,
+        "total_questions": total_questions,
+        "max_marks": attempt.max_marks or 0.0,
+        "time_duration": quiz.time_duration,
+        # Attempt details
+        "attempt_id": attempt.id,
+        "start_time": (attempt.start_time.isoformat() if attempt.start_time else None),
+        "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
+        "score": attempt.score,
+        "attempted_count": attempted_count,
+        "correct_count": attempt.correct_count or 0,
+        "wrong_count": attempt.wrong_count or 0,
+        "unattempted_count": total_questions - attempted_count,
+    }
 
-        if not quiz:
-            continue
-
-        # Get total questions and max marks for this quiz
-        questions = Question.query.filter_by(quiz_id=quiz.id).all()
-        total_questions = len(questions)
-        max_marks = sum(q.max_marks for q in questions)
-
-        # Get user responses for this attempt
-        responses = UserResponse.query.filter_by(attempt_id=attempt.id).all()
-
-        # Calculate statistics
-        attempted_count = len([r for r in responses if r.is_attempted])
-        correct_count = 0
-        wrong_count = 0
-
-        for response in responses:
-            if response.is_attempted and response.option_id:
-                # Check if the selected option is correct
-                option = Option.query.get(response.option_id)
-                if option and option.is_correct:
-                    correct_count += 1
-                else:
-                    wrong_count += 1
-
-        # Create history object
-        history_item = {
-            # Quiz details
-            "quiz_id": quiz.id,
-            "subject_name": quiz.chapter.subject.name,
-            "chapter_name": quiz.chapter.name,
-            "quiz_title": quiz.title,
-            "quiz_date": quiz.quiz_date.isoformat() if quiz.quiz_date else None,
-            "total_questions": total_questions,
-            "max_marks": max_marks,
-            "time_duration": quiz.time_duration,
-            # Attempt details
-            "attempt_id": attempt.id,
-            "start_time": (
-                attempt.start_time.isoformat() if attempt.start_time else None
-            ),
-            "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
-            "score": attempt.score,
-            "attempted_count": attempted_count,
-            "correct_count": correct_count,
-            "wrong_count": wrong_count,
-            "unattempted_count": total_questions - attempted_count,
-        }
 
-        history.append(history_item)
+def get_user_quiz_history(user_id):
+    return [_history_item(row) for row in _user_history_query(user_id)]
 
-    return history
+
+def _decode_history_cursor(cursor):
+    try:
+        end_time, attempt_id = decode_cursor(cursor)
+        return datetime.fromisoformat(end_time), int(attempt_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def get_user_quiz_history_page(user_id, limit, cursor=None):
+    """
+    Keyset-paginated history, newest first. Returns (items, next_cursor);
+    next_cursor is None on the last page.
+    """
+    query = _user_history_query(user_id)
+    if cursor:
+        end_time, attempt_id = _decode_history_cursor(cursor)
+        query = query.filter(
+            or_(
+                QuizAttempt.end_time < end_time,
+                and_(QuizAttempt.end_time == end_time, QuizAttempt.id < attempt_id),
+            )
+        )
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].QuizAttempt
+        next_cursor = encode_cursor([last.end_time.isoformat(), last.id])
+    return [_history_item(row) for row in rows], next_cursor
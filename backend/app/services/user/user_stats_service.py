@@ -0,0 +1,307 @@
+from datetime import datetime, timezone
+from sqlalchemy import case, or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Chapter, Quiz, QuizAttempt, Subject, UserStats
+
+# Months of the trend returned by get_user_summary, most recent last
+MONTHLY_TREND_MONTHS = 12
+
+
+def _month(end_time):
+    return end_time.strftime("%Y-%m")
+
+
+def _percentage(score, max_marks):
+    return score / max_marks * 100 if max_marks else None
+
+
+def _scope_keys(chapter_id, subject_id, end_time):
+    return [
+        ("subject", str(subject_id)),
+        ("chapter", str(chapter_id)),
+        ("month", _month(end_time)),
+    ]
+
+
+def _upsert(user_id, scope, scope_key, summary, duration_seconds):
+    score = summary["score"]
+    percentage = _percentage(score, summary["max_marks"])
+    values = {
+        UserStats.attempt_count: UserStats.attempt_count + 1,
+        UserStats.score_sum: UserStats.score_sum + score,
+        UserStats.max_marks_sum: UserStats.max_marks_sum + summary["max_marks"],
+        UserStats.best_score: case(
+            (
+                or_(UserStats.best_score.is_(None), UserStats.best_score < score),
+                score,
+            ),
+            else_=UserStats.best_score,
+        ),
+        UserStats.total_questions: UserStats.total_questions
+        + summary["total_questions"],
+        UserStats.attempted_count: UserStats.attempted_count
+        + summary["attempted_count"],
+        UserStats.correct_count: UserStats.correct_count + summary["correct_count"],
+        UserStats.duration_sum: UserStats.duration_sum + (duration_seconds or 0),
+        UserStats.updated_at: datetime.now(timezone.utc),
+    }
+    if percentage is not None:
+        values[UserStats.best_percentage] = case(
+            (
+                or_(
+                    UserStats.best_percentage.is_(None),
+                    UserStats.best_percentage < percentage,
+                ),
+                percentage,
+            ),
+            else_=UserStats.best_percentage,
+        )
+
+    def update():
+        return UserStats.query.filter_by(
+            user_id=user_id, scope=scope, scope_key=scope_key
+        ).update(values, synchronize_session=False)
+
+    if update():
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(
+                UserStats(
+                    user_id=user_id,
+                    scope=scope,
+                    scope_key=scope_key,
+                    attempt_count=1,
+                    score_sum=score,
+                    max_marks_sum=summary["max_marks"],
+                    best_score=score,
+                    best_percentage=percentage,
+                    total_questions=summary["total_questions"],
+                    attempted_count=summary["attempted_count"],
+                    correct_count=summary["correct_count"],
+                    duration_sum=duration_seconds or 0,
+                )
+            )
+    except IntegrityError:
+        # Another submit of the user created the row first
+        update()
+
+
+def record_user_stats(user_id, quiz_id, summary, end_time, duration_seconds):
+    """
+    Fold one submitted attempt, graded into summary, into the subject,
+    chapter and month stats of its user. Stages the change in the current
+    transaction.
+    """
+    scope_ids = (
+        db.session.query(Quiz.chapter_id, Chapter.subject_id)
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .filter(Quiz.id == quiz_id)
+        .first()
+    )
+    if scope_ids is None:
+        return
+    for scope, scope_key in _scope_keys(*scope_ids, end_time):
+        _upsert(user_id, scope, scope_key, summary, duration_seconds)
+
+
+def rebuild_user_stats(user_id=None, quiz_id=None):
+    """
+    Recompute user_stats from the completed attempts, for every user, just
+    user_id, or the users who attempted quiz_id, and commit. Returns the
+    number of users with stats.
+    """
+    completed = [QuizAttempt.in_progress == False]
+    if user_id is not None:
+        completed.append(QuizAttempt.user_id == user_id)
+    if quiz_id is not None:
+        users = db.session.query(QuizAttempt.user_id).filter(
+            QuizAttempt.quiz_id == quiz_id
+        )
+        completed.append(QuizAttempt.user_id.in_(users.scalar_subquery()))
+
+    rows = (
+        db.session.query(
+            QuizAttempt.user_id,
+            QuizAttempt.score,
+            QuizAttempt.max_marks,
+            QuizAttempt.total_questions,
+            QuizAttempt.attempted_count,
+            QuizAttempt.correct_count,
+            QuizAttempt.duration_seconds,
+            QuizAttempt.end_time,
+            Quiz.chapter_id,
+            Chapter.subject_id,
+        )
+        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .filter(*completed, QuizAttempt.end_time.isnot(None))
+        .yield_per(1000)
+    )
+    stats = {}
+    for row in rows:
+        percentage = _percentage(row.score, row.max_marks)
+        for scope, scope_key in _scope_keys(
+            row.chapter_id, row.subject_id, row.end_time
+        ):
+            key = (row.user_id, scope, scope_key)
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = UserStats(
+                    user_id=row.user_id,
+                    scope=scope,
+                    scope_key=scope_key,
+                    attempt_count=0,
+                    score_sum=0,
+                    max_marks_sum=0,
+                    total_questions=0,
+                    attempted_count=0,
+                    correct_count=0,
+                    duration_sum=0,
+                )
+            entry.attempt_count += 1
+            entry.score_sum += row.score
+            entry.max_marks_sum += row.max_marks or 0
+            entry.total_questions += row.total_questions or 0
+            entry.attempted_count += row.attempted_count or 0
+            entry.correct_count += row.correct_count or 0
+            entry.duration_sum += row.duration_seconds or 0
+            if entry.best_score is None or entry.best_score < row.score:
+                entry.best_score = row.score
+            if percentage is not None and (
+                entry.best_percentage is None or entry.best_percentage < percentage
+            ):
+                entry.best_percentage = percentage
+
+    try:
+        stale = UserStats.query
+        if user_id is not None:
+            stale = stale.filter_by(user_id=user_id)
+        if quiz_id is not None:
+            stale = stale.filter(UserStats.user_id.in_(users.scalar_subquery()))
+        stale.delete(synchronize_session=False)
+        db.session.add_all(stats.values())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len({key[0] for key in stats})
+
+
+def _stats_item(stats):
+    attempts = stats.attempt_count
+    return {
+        "attempts": attempts,
+        "average_score": round(stats.score_sum / attempts, 2) if attempts else 0,
+        "best_score": stats.best_score,
+        "average_percentage": (
+            round(stats.score_sum / stats.max_marks_sum * 100, 2)
+            if stats.max_marks_sum
+            else None
+        ),
+        "best_percentage": (
+            round(stats.best_percentage, 2)
+            if stats.best_percentage is not None
+            else None
+        ),
+        "accuracy": (
+            round(stats.correct_count / stats.attempted_count * 100, 2)
+            if stats.attempted_count
+            else None
+        ),
+        "questions_attempted": stats.attempted_count,
+        "questions_correct": stats.correct_count,
+        "total_questions": stats.total_questions,
+        "total_time_minutes": round(stats.duration_sum / 60, 2),
+    }
+
+
+def _overall(months):
+    """Totals over every attempt; each attempt is in exactly one month."""
+    total = UserStats(
+        attempt_count=sum(m.attempt_count for m in months),
+        score_sum=sum(m.score_sum for m in months),
+        max_marks_sum=sum(m.max_marks_sum for m in months),
+        best_score=max((m.best_score for m in months), default=None),
+        best_percentage=max(
+            (m.best_percentage for m in months if m.best_percentage is not None),
+            default=None,
+        ),
+        total_questions=sum(m.total_questions for m in months),
+        attempted_count=sum(m.attempted_count for m in months),
+        correct_count=sum(m.correct_count for m in months),
+        duration_sum=sum(m.duration_sum for m in months),
+    )
+    return _stats_item(total)
+
+
+def get_user_summary(user_id):
+    """
+    Performance summary of a user per subject, per chapter and per month of
+    submission (the last MONTHLY_TREND_MONTHS months with attempts), read
+    from user_stats.
+    """
+    by_scope = {scope: [] for scope in UserStats.SCOPES}
+    for stats in UserStats.query.filter_by(user_id=user_id):
+        by_scope[stats.scope].append(stats)
+
+    subject_ids = [int(s.scope_key) for s in by_scope["subject"]]
+    chapter_ids = [int(s.scope_key) for s in by_scope["chapter"]]
+    subjects = {}
+    if subject_ids:
+        subjects = {
+            row.id: row.name
+            for row in db.session.query(Subject.id, Subject.name).filter(
+                Subject.id.in_(subject_ids)
+            )
+        }
+    chapters = {}
+    if chapter_ids:
+        chapters = {
+            row.id: row
+            for row in db.session.query(
+                Chapter.id,
+                Chapter.name,
+                Chapter.subject_id,
+                Subject.name.label("subject_name"),
+            )
+            .join(Subject, Subject.id == Chapter.subject_id)
+            .filter(Chapter.id.in_(chapter_ids))
+        }
+
+    subject_items = [
+        {
+            "subject_id": int(stats.scope_key),
+            "subject_name": subjects.get(int(stats.scope_key)),
+            **_stats_item(stats),
+        }
+        for stats in by_scope["subject"]
+    ]
+    chapter_items = []
+    for stats in by_scope["chapter"]:
+        chapter = chapters.get(int(stats.scope_key))
+        chapter_items.append(
+            {
+                "chapter_id": int(stats.scope_key),
+                "chapter_name": chapter.name if chapter else None,
+                "subject_id": chapter.subject_id if chapter else None,
+                "subject_name": chapter.subject_name if chapter else None,
+                **_stats_item(stats),
+            }
+        )
+    months = sorted(by_scope["month"], key=lambda stats: stats.scope_key)
+
+    return {
+        "user_id": user_id,
+        "overall": _overall(months),
+        "subjects": sorted(subject_items, key=lambda s: s["subject_name"] or ""),
+        "chapters": sorted(
+            chapter_items,
+            key=lambda c: (c["subject_name"] or "", c["chapter_name"] or ""),
+        ),
+        "monthly_trend": [
+            {"month": stats.scope_key, **_stats_item(stats)}
+            for stats in months[-MONTHLY_TREND_MONTHS:]
+        ],
+    }
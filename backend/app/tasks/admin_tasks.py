@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from app.celery_app import celery_app
+from app.services.admin.item_analysis_service import refresh_item_analysis
+from app.services.admin.analytics_export_service import export_analytics
+
+
+@celery_app.task(bind=True, name="app.tasks.admin_tasks.compute_item_analysis")
+def compute_item_analysis(self, quiz_id):
+    try:
+        print(f"Computing item analysis for quiz {quiz_id}")
+        analysis = refresh_item_analysis(quiz_id)
+        print(
+            f"Item analysis of quiz {quiz_id}: {analysis['attempt_count']} attempts, "
+            f"{analysis['response_count']} responses"
+        )
+        return {
+            "status": "success",
+            "quiz_id": quiz_id,
+            "attempt_count": analysis["attempt_count"],
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+    except Exception as exc:
+        print(f"Item analysis failed for quiz {quiz_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@celery_app.task(bind=True, name="app.tasks.admin_tasks.export_analytics_data")
+def export_analytics_data(self, export_format="parquet", quiz_id=None):
+    try:
+        print(f"Starting {export_format} analytics export (quiz {quiz_id or 'all'})")
+        files = export_analytics(export_format, quiz_id)
+        msg = {
+            "status": "success",
+            "export_type": "analytics",
+            "format": export_format,
+            "quiz_id": quiz_id,
+            "files": files,
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        print(
+            f"Analytics export completed: {files['attempts']['rows']} attempts, "
+            f"{files['responses']['rows']} responses"
+        )
+        # Not published over SSE: the stream is shared with every user, so
+        # the admin polls the task result instead
+        return msg
+    except Exception as exc:
+        print(f"Analytics export failed: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60, max_retries=3)
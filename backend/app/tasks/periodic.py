@@ -1,122 +1,496 @@
 from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from operator import attrgetter
+from flask import current_app
+from celery import chord
+from sqlalchemy import func
 from app.celery_app import celery_app
 from app import db
-from app.models import User, QuizAttempt, Quiz
-from app.utils.mail import send_email, create_email_template
+from app.models import User, QuizAttempt, Quiz, Chapter
+from app.utils.mail import (
+    build_message,
+    create_email_template,
+    prerender_template,
+    send_email_batch,
+)
+from app.services.user.answer_buffer import (
+    write_behind_enabled,
+    get_dirty_attempt_ids,
+    discard_answers,
+)
+from app.services.user.quiz_service import flush_buffered_answers
+from app.services.user.delivery_service import (
+    claim_deliveries,
+    record_deliveries,
+    release_deliveries,
+    sent_user_ids,
+)
+from app.services.catalog import get_quiz_payload, get_answer_key
+from app.services.catalog.score_distribution_service import rebuild_score_histogram
+from app.services.catalog.leaderboard_service import (
+    rebuild_quiz_leaderboard,
+    redis_leaderboard_enabled,
+)
+
+
+def render_daily_reminder(today, quizzes):
+    """
+    Subject and prerendered HTML and text bodies of the daily reminder for
+    quizzes (rows with title, chapter_name, time_duration and quiz_date).
+    The bodies are functions of the recipient's username.
+    """
+    date = today.strftime("%B %d, %Y")
+    context = {"today": today, "quizzes": quizzes}
+    html_body = prerender_template(
+        "email/daily_reminder.html",
+        ["username"],
+        title=f"Today's Quizzes - {date}",
+        footer_text="This is an automated reminder from Quiz Master. Stay focused and do your best! 📚✨",
+        **context,
+    )
+    text_body = prerender_template("email/daily_reminder.txt", ["username"], **context)
+    return f"📚 Today's Quizzes - {date}", html_body, text_body
+
+
+def _report_period(user_ids, last_month_first_day, today):
+    return [
+        QuizAttempt.user_id.in_(user_ids),
+        QuizAttempt.start_time >= last_month_first_day,
+        QuizAttempt.start_time <= today,
+    ]
+
+
+def monthly_report_stats(user_ids, last_month_first_day, today):
+    """
+    Attempt count and total, average and highest score of each of user_ids
+    over the period, from one GROUP BY query. Users without attempts in the
+    period are missing from the result.
+    """
+    rows = (
+        db.session.query(
+            QuizAttempt.user_id,
+            func.count(QuizAttempt.id).label("attempts"),
+            func.sum(QuizAttempt.score).label("total_score"),
+            func.avg(QuizAttempt.score).label("avg_score"),
+            func.max(QuizAttempt.score).label("max_score"),
+        )
+        .filter(*_report_period(user_ids, last_month_first_day, today))
+        .group_by(QuizAttempt.user_id)
+    )
+    return {row.user_id: row for row in rows}
+
+
+def monthly_report_attempts(user_ids, last_month_first_day, today):
+    """
+    (user_id, attempts) for each of user_ids with attempts in the period, in
+    user_id order. The attempt rows (title, start_time, score) come from one
+    query streamed in batches, so only the rows of the current user are
+    held; each group has to be consumed before moving on to the next.
+    """
+    rows = (
+        db.session.query(
+            QuizAttempt.user_id, Quiz.title, QuizAttempt.start_time, QuizAttempt.score
+        )
+        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+        .filter(*_report_period(user_ids, last_month_first_day, today))
+        .order_by(QuizAttempt.user_id, QuizAttempt.start_time, QuizAttempt.id)
+        .yield_per(1000)
+    )
+    return groupby(rows, key=attrgetter("user_id"))
+
+
+def monthly_report_messages(users, last_month_first_day, today):
+    """
+    Monthly report emails of users (ordered by id), loading the data of the
+    whole chunk with two queries instead of one per user and attempt.
+    """
+    user_ids = [user.id for user in users]
+    stats = monthly_report_stats(user_ids, last_month_first_day, today)
+    attempts = monthly_report_attempts(user_ids, last_month_first_day, today)
+    print(f"Found quiz attempts for {len(stats)} of {len(users)} users")
+
+    user_id, rows = next(attempts, (None, None))
+    for user in users:
+        quiz_attempts = []
+        # Both are in user_id order, so the attempt groups are walked once
+        while user_id is not None and user_id <= user.id:
+            if user_id == user.id:
+                quiz_attempts = list(rows)
+            user_id, rows = next(attempts, (None, None))
+        yield monthly_report_message(
+            user, stats.get(user.id), quiz_attempts, last_month_first_day, today
+        )
+
+
+def monthly_report_message(user, stats, quiz_attempts, last_month_first_day, today):
+    """
+    Monthly report email of a user from the stats of monthly_report_stats
+    (None without attempts) and the attempt rows of monthly_report_attempts.
+    """
+    # Create HTML content
+    greeting = f'<div class="greeting">Dear <strong>{user.username}</strong>,</div>'
+    period = f"<p>Here is your monthly performance report for the period <strong>{last_month_first_day.strftime('%B %d, %Y')}</strong> to <strong>{today.strftime('%B %d, %Y')}</strong>:</p>"
+
+    if stats is None:
+        no_attempts = "<div class=\"no-content\">📊 No quiz attempts found for this period.<br/>Don't worry, there's always next month to shine! ⭐</div>"
+        html_content = greeting + period + no_attempts
+        text_content = f"Dear {user.username},\n\nHere is your monthly report for the period {today.strftime('%Y-%m-%d')} - {last_month_first_day.strftime('%Y-%m-%d')}\n\nNo quiz attempts found for the period\n"
+    else:
+        total_score = stats.total_score
+        avg_score = stats.avg_score
+        max_score = stats.max_score
+
+        # Statistics section
+        stats_section = f"""
+        <div class="stats-container">
+            <div class="stat-box">
+                <div class="stat-number">{stats.attempts}</div>
+                <div class="stat-label">TOTAL ATTEMPTS</div>
+            </div>
+            <div class="stat-box">
+                <div class="stat-number">{total_score:.1f}</div>
+                <div class="stat-label">TOTAL SCORE</div>
+            </div>
+            <div class="stat-box">
+                <div class="stat-number">{avg_score:.1f}</div>
+                <div class="stat-label">AVERAGE SCORE</div>
+            </div>
+            <div class="stat-box">
+                <div class="stat-number">{max_score:.1f}</div>
+                <div class="stat-label">HIGHEST SCORE</div>
+            </div>
+        </div>
+        """
+
+        # Quiz attempts table
+        attempts_table = """
+        <h3>📋 Quiz Attempt Details</h3>
+        <table class="quiz-table">
+            <thead>
+                <tr>
+                    <th>📚 Quiz Title</th>
+                    <th>📅 Date</th>
+                    <th>⏰ Time</th>
+                    <th>🎯 Score</th>
+                </tr>
+            </thead>
+            <tbody>
+        """
+
+        for quiz_attempt in quiz_attempts:
+            attempts_table += f"""
+                <tr>
+                    <td><strong>{quiz_attempt.title}</strong></td>
+                    <td>{quiz_attempt.start_time.strftime('%B %d, %Y')}</td>
+                    <td>{quiz_attempt.start_time.strftime('%H:%M')}</td>
+                    <td><strong>{quiz_attempt.score:.1f}</strong></td>
+                </tr>
+            """
+
+        attempts_table += "</tbody></table>"
+
+        encouragement = "<p>Keep up the great work! Your dedication to learning is truly commendable. 🌟</p>"
+
+        html_content = (
+            greeting + period + stats_section + attempts_table + encouragement
+        )
+
+        # Plain text fallback
+        text_content = f"Dear {user.username},\n\nHere is your monthly report for the period {today.strftime('%Y-%m-%d')} - {last_month_first_day.strftime('%Y-%m-%d')}\n\n"
+        text_content += f"Total Quiz Attempts: {stats.attempts}\n"
+        text_content += f"Total Score: {total_score:.1f}\n"
+        text_content += f"Average Score: {avg_score:.1f}\n"
+        text_content += f"Highest Score: {max_score:.1f}\n\n"
+        for quiz_attempt in quiz_attempts:
+            text_content += f"Quiz Title: {quiz_attempt.title}\nQuiz Date: {quiz_attempt.start_time.strftime('%Y-%m-%d %H:%M:%S')}\nScore: {quiz_attempt.score:.1f}\n\n"
+
+    # Generate HTML email
+    html_body = create_email_template(
+        title=f"Monthly Performance Report - {last_month_first_day.strftime('%B %Y')}",
+        content=html_content,
+        footer_text="This is your automated monthly report from Quiz Master. Keep learning and growing! 🚀📈",
+    )
+
+    return build_message(
+        f"📊 Monthly Report - {last_month_first_day.strftime('%B %Y')}",
+        [user.email],
+        text_content,
+        html_body,
+    )
+
+
+# Kinds of the periodic emails in the delivery ledger
+DAILY_REMINDER = "daily_reminder"
+MONTHLY_REPORT = "monthly_report"
+
+
+def daily_reminder_period(today):
+    return today.strftime("%Y-%m-%d")
+
+
+def monthly_report_period(last_month_first_day):
+    return last_month_first_day.strftime("%Y-%m")
+
+
+def active_user_id_chunks(chunk_size, exclude=None):
+    """
+    Ids of the active non-admin users in chunks of chunk_size, by id,
+    leaving out the ids selected by the exclude query.
+    """
+    last_id = 0
+    while True:
+        query = db.session.query(User.id).filter(
+            User.is_blocked == False, User.is_admin == False, User.id > last_id
+        )
+        if exclude is not None:
+            query = query.filter(~User.id.in_(exclude))
+        user_ids = [user_id for (user_id,) in query.order_by(User.id).limit(chunk_size)]
+        if not user_ids:
+            return
+        yield user_ids
+        last_id = user_ids[-1]
+
+
+def _active_users(user_ids, *columns):
+    return (
+        db.session.query(*columns)
+        .filter(User.id.in_(user_ids), User.is_blocked == False)
+        .order_by(User.id)
+        .all()
+    )
+
+
+def _claim_users(kind, period, user_ids, *columns):
+    """
+    Claim the emails of the run for the active users among user_ids and load
+    them. Returns (claim token, users); users that were already sent to, or
+    are claimed by another task, are left out.
+    """
+    token, claimed = claim_deliveries(kind, period, user_ids)
+    if not claimed:
+        return token, []
+    return token, _active_users(sorted(claimed), *columns)
+
+
+def fan_out(kind, period, chunk_task, *args):
+    """
+    Queue chunk_task(user_ids, *args) for every chunk of MAIL_CHUNK_SIZE
+    active users not yet sent the email of the run, with summarize_mail_run
+    as the chord callback. A rerun after a crash or an overlapping beat
+    therefore only covers the users still waiting for the email.
+    """
+    chunks = [
+        chunk_task.s(user_ids, *args)
+        for user_ids in active_user_id_chunks(
+            current_app.config["MAIL_CHUNK_SIZE"], exclude=sent_user_ids(kind, period)
+        )
+    ]
+    users = sum(len(chunk.args[0]) for chunk in chunks)
+    print(f"Dispatching {kind} to {users} users in {len(chunks)} chunks")
+    if chunks:
+        chord(chunks)(summarize_mail_run.s(kind))
+    return {
+        "status": "dispatched",
+        "users": users,
+        "chunks": len(chunks),
+        "dispatched_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def deliver_chunk(task, kind, period, token, users, messages, chunk_args, sent=0):
+    """
+    Send the messages of a chunk task, recording every SMTP batch in the
+    delivery ledger as it completes, and retry the task with only the users
+    whose message failed, so users already mailed never get a second copy.
+    Once the retries are used up the failures are reported instead of raised,
+    letting the summary of the run still fire.
+    """
+    user_ids = {user.email: user.id for user in users}
+    failed_ids = []
+    # Users mailed so far, and those of them not recorded in the ledger yet
+    delivered_ids = set()
+    unrecorded_ids = set()
+
+    def checkpoint(delivered, failures):
+        errors = {
+            user_ids[email]: failure["error"]
+            for failure in failures
+            for email in failure["recipients"]
+        }
+        sent_ids = [
+            user_ids[email] for message in delivered for email in message.recipients
+        ]
+        delivered_ids.update(sent_ids)
+        unrecorded_ids.update(sent_ids)
+        record_deliveries(kind, period, token, sent_ids, errors)
+        unrecorded_ids.difference_update(sent_ids)
+        failed_ids.extend(errors)
+
+    try:
+        result = send_email_batch(messages, on_batch=checkpoint)
+    except Exception as exc:
+        # E.g. the ledger could not be written. Users mailed but not recorded
+        # keep the claim, so no run mails them again before it goes stale.
+        print(f"{kind} chunk failed while sending: {str(exc)}")
+        return fail_chunk(
+            task,
+            exc,
+            kind,
+            period,
+            token,
+            [user.id for user in users if user.id not in delivered_ids],
+            sent + len(delivered_ids),
+            countdown=60 * (task.request.retries + 1),
+            keep_ids=unrecorded_ids,
+        )
+    try:
+        # Users of a batch that never completed go back to the run
+        release_deliveries(kind, period, token)
+    except Exception as e:
+        print(f"Failed to release {kind} claim: {str(e)}")
+    sent += result["sent"]
+    if failed_ids and task.request.retries < task.max_retries:
+        print(f"Retrying {len(failed_ids)} failed users of chunk")
+        raise task.retry(
+            args=[failed_ids, *chunk_args],
+            kwargs={"sent": sent},
+            countdown=60 * (task.request.retries + 1),
+        )
+    return {"sent": sent, "failed": len(failed_ids), "failed_user_ids": failed_ids}
+
+
+def fail_chunk(
+    task, exc, kind, period, token, user_ids, sent, countdown, keep_ids=None
+):
+    """
+    Handle a chunk task that raised: give back its claim, except for the
+    users in keep_ids, and retry it. Once the retries are used up user_ids
+    are reported as failed instead of raised, as in deliver_chunk, so that
+    the summary of the run still fires.
+    """
+    if token is not None:
+        try:
+            release_deliveries(kind, period, token, keep_ids)
+        except Exception as e:
+            # The claim goes stale after MAIL_CLAIM_TIMEOUT_SECONDS instead
+            print(f"Failed to release {kind} claim: {str(e)}")
+    if task.request.retries >= task.max_retries:
+        print(f"Giving up on {kind} chunk of {len(user_ids)} users")
+        return {"sent": sent, "failed": len(user_ids), "failed_user_ids": user_ids}
+    raise task.retry(exc=exc, countdown=countdown, kwargs={"sent": sent})
+
+
+@celery_app.task(bind=True, name="app.tasks.periodic.summarize_mail_run")
+def summarize_mail_run(self, results, kind):
+    """Chord callback adding up the results of the chunks of a mail run."""
+    summary = {
+        "status": "success",
+        "kind": kind,
+        "chunks": len(results),
+        "emails_sent": sum(result["sent"] for result in results),
+        "emails_failed": sum(result["failed"] for result in results),
+        "failed_user_ids": [
+            user_id for result in results for user_id in result["failed_user_ids"]
+        ],
+        "completed_at": datetime.now(timezone.utc).isoformat(),
+    }
+    print(
+        f"{kind}: {summary['emails_sent']} sent, {summary['emails_failed']} failed "
+        f"across {summary['chunks']} chunks"
+    )
+    return summary
+
+
+def _todays_quizzes(today):
+    # quiz date > today 00:00:00 and quiz date < today 23:59:59
+    return (
+        db.session.query(
+            Quiz.title,
+            Quiz.time_duration,
+            Quiz.quiz_date,
+            Chapter.name.label("chapter_name"),
+        )
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .filter(
+            Quiz.quiz_date >= today.replace(hour=0, minute=0, second=0),
+            Quiz.quiz_date <= today.replace(hour=23, minute=59, second=59),
+        )
+        .order_by(Quiz.quiz_date)
+        .all()
+    )
 
 
 @celery_app.task(bind=True, name="app.tasks.periodic.send_daily_reminders")
 def send_daily_reminders(self):
-
+    """Queue the daily reminder for every active user in chunks."""
     try:
         print("Starting daily reminders task")
-
-        active_users = User.query.filter_by(is_blocked=False, is_admin=False).all()
-        print(f"Found {len(active_users)} active users")
         today = datetime.now(timezone.utc)
-        # quiz date > today 00:00:00 and quiz date < today 23:59:59
-        today_quizzes = Quiz.query.filter(
-            Quiz.quiz_date >= today.replace(hour=0, minute=0, second=0),
-            Quiz.quiz_date <= today.replace(hour=23, minute=59, second=59),
-        ).all()
+        today_quizzes = _todays_quizzes(today)
         print(f"Found {len(today_quizzes)} today's quizzes")
 
         if len(today_quizzes) == 0:
             print("No quizzes today")
             return {
                 "status": "success",
-                "users_checked": len(active_users),
+                "users": 0,
                 "completed_at": datetime.now(timezone.utc).isoformat(),
             }
 
-        # Create HTML content for today's quizzes
-        for user in active_users:
-            print(f"Sending reminder to user {user.username}")
-
-            # Create HTML content
-            greeting = (
-                f'<div class="greeting">Dear <strong>{user.username}</strong>,</div>'
-            )
-            intro = f'<p>Here are the quizzes scheduled for today, <strong>{today.strftime("%B %d, %Y")}</strong>:</p>'
-
-            # Create quiz table
-            quiz_table = """
-            <table class="quiz-table">
-                <thead>
-                    <tr>
-                        <th>📚 Quiz Title</th>
-                        <th>📖 Chapter</th>
-                        <th>⏱️ Duration</th>
-                        <th>🕐 Time</th>
-                    </tr>
-                </thead>
-                <tbody>
-            """
+        # Chunks get the same day even when they run after midnight
+        return fan_out(
+            DAILY_REMINDER,
+            daily_reminder_period(today),
+            send_reminder_chunk,
+            today.isoformat(),
+        )
 
-            for quiz in today_quizzes:
-                quiz_table += f"""
-                    <tr>
-                        <td><strong>{quiz.title}</strong></td>
-                        <td>{quiz.chapter.name}</td>
-                        <td>{quiz.time_duration} minutes</td>
-                        <td>{quiz.quiz_date.strftime('%H:%M')}</td>
-                    </tr>
-                """
-
-            quiz_table += "</tbody></table>"
-
-            # Add summary stats
-            stats_section = f"""
-            <div class="stats-container">
-                <div class="stat-box">
-                    <div class="stat-number">{len(today_quizzes)}</div>
-                    <div class="stat-label">QUIZZES TODAY</div>
-                </div>
-                <div class="stat-box">
-                    <div class="stat-number">{sum(q.time_duration for q in today_quizzes)}</div>
-                    <div class="stat-label">TOTAL MINUTES</div>
-                </div>
-            </div>
-            """
-
-            closing = "<p>Good luck with your quizzes! 🎯</p>"
-
-            html_content = greeting + intro + quiz_table + stats_section + closing
-
-            # Create plain text fallback
-            text_content = f"Dear {user.username},\n\nHere are the quizzes for today {today.strftime('%Y-%m-%d')}\n\n"
-            for quiz in today_quizzes:
-                text_content += f"Title: {quiz.title}\nChapter: {quiz.chapter.name}\nTime Duration: {quiz.time_duration} mins\nQuiz Date: {quiz.quiz_date.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    except Exception as exc:
+        print(f"Daily reminders task failed: {str(exc)}")
+        # Nothing is sent here, and the chunks skip users already sent to
+        raise self.retry(exc=exc, countdown=60, max_retries=3)
 
-            # Generate HTML email
-            html_body = create_email_template(
-                title=f"Today's Quizzes - {today.strftime('%B %d, %Y')}",
-                content=html_content,
-                footer_text="This is an automated reminder from Quiz Master. Stay focused and do your best! 📚✨",
-            )
 
-            send_email(
-                f"📚 Today's Quizzes - {today.strftime('%B %d, %Y')}",
+@celery_app.task(
+    bind=True, name="app.tasks.periodic.send_reminder_chunk", max_retries=3
+)
+def send_reminder_chunk(self, user_ids, today, sent=0):
+    """Send the daily reminder of today (ISO datetime) to a chunk of users."""
+    token = period = None
+    try:
+        today = datetime.fromisoformat(today)
+        period = daily_reminder_period(today)
+        token, users = _claim_users(
+            DAILY_REMINDER, period, user_ids, User.id, User.username, User.email
+        )
+        today_quizzes = _todays_quizzes(today)
+        # The quiz table, stats and styles are the same for everyone, so the
+        # emails are rendered once and only the greeting is filled per user.
+        # They are all built before the first one is sent, so a rendering
+        # error cannot stop a run halfway through an unrecorded batch.
+        subject, html_body, text_body = render_daily_reminder(today, today_quizzes)
+        messages = [
+            build_message(
+                subject,
                 [user.email],
-                text_content,
-                html_body,
+                text_body(username=user.username),
+                html_body(username=user.username),
             )
-
-        return {
-            "status": "success",
-            "users_checked": len(active_users),
-            "completed_at": datetime.now(timezone.utc).isoformat(),
-        }
-
+            for user in users
+        ]
     except Exception as exc:
-        print(f"Daily reminders task failed: {str(exc)}")
-        # Retry with exponential backoff
-        raise self.retry(exc=exc, countdown=60, max_retries=3)
+        print(f"Reminder chunk failed before sending: {str(exc)}")
+        return fail_chunk(
+            self, exc, DAILY_REMINDER, period, token, user_ids, sent, countdown=60
+        )
+    return deliver_chunk(
+        self, DAILY_REMINDER, period, token, users, messages, [today.isoformat()], sent
+    )
 
 
 @celery_app.task(bind=True, name="app.tasks.periodic.generate_monthly_reports")
 def generate_monthly_reports(self):
-
+    """Queue the monthly report for every active user in chunks."""
     try:
         print("Starting monthly reports generation")
 
@@ -124,121 +498,125 @@ def generate_monthly_reports(self):
         today = datetime.now(timezone.utc)
         last_month_first_day = today.replace(day=1)
 
-        active_users = User.query.filter_by(is_blocked=False, is_admin=False).all()
-        print(f"Found {len(active_users)} active users")
-
-        for user in active_users:
-            quiz_attempts = QuizAttempt.query.filter(
-                QuizAttempt.user_id == user.id,
-                QuizAttempt.start_time >= last_month_first_day,
-                QuizAttempt.start_time <= today,
-            ).all()
-            print(f"Found {len(quiz_attempts)} quiz attempts for user {user.username}")
-
-            # Create HTML content
-            greeting = (
-                f'<div class="greeting">Dear <strong>{user.username}</strong>,</div>'
-            )
-            period = f"<p>Here is your monthly performance report for the period <strong>{last_month_first_day.strftime('%B %d, %Y')}</strong> to <strong>{today.strftime('%B %d, %Y')}</strong>:</p>"
-
-            if len(quiz_attempts) == 0:
-                no_attempts = "<div class=\"no-content\">📊 No quiz attempts found for this period.<br/>Don't worry, there's always next month to shine! ⭐</div>"
-                html_content = greeting + period + no_attempts
-                text_content = f"Dear {user.username},\n\nHere is your monthly report for the period {today.strftime('%Y-%m-%d')} - {last_month_first_day.strftime('%Y-%m-%d')}\n\nNo quiz attempts found for the period\n"
-            else:
-                # Calculate statistics
-                total_score = sum(quiz_attempt.score for quiz_attempt in quiz_attempts)
-                avg_score = total_score / len(quiz_attempts)
-                max_score = max(quiz_attempt.score for quiz_attempt in quiz_attempts)
-
-                # Statistics section
-                stats_section = f"""
-                <div class="stats-container">
-                    <div class="stat-box">
-                        <div class="stat-number">{len(quiz_attempts)}</div>
-                        <div class="stat-label">TOTAL ATTEMPTS</div>
-                    </div>
-                    <div class="stat-box">
-                        <div class="stat-number">{total_score:.1f}</div>
-                        <div class="stat-label">TOTAL SCORE</div>
-                    </div>
-                    <div class="stat-box">
-                        <div class="stat-number">{avg_score:.1f}</div>
-                        <div class="stat-label">AVERAGE SCORE</div>
-                    </div>
-                    <div class="stat-box">
-                        <div class="stat-number">{max_score:.1f}</div>
-                        <div class="stat-label">HIGHEST SCORE</div>
-                    </div>
-                </div>
-                """
-
-                # Quiz attempts table
-                attempts_table = """
-                <h3>📋 Quiz Attempt Details</h3>
-                <table class="quiz-table">
-                    <thead>
-                        <tr>
-                            <th>📚 Quiz Title</th>
-                            <th>📅 Date</th>
-                            <th>⏰ Time</th>
-                            <th>🎯 Score</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                """
-
-                for quiz_attempt in quiz_attempts:
-                    attempts_table += f"""
-                        <tr>
-                            <td><strong>{quiz_attempt.quiz.title}</strong></td>
-                            <td>{quiz_attempt.start_time.strftime('%B %d, %Y')}</td>
-                            <td>{quiz_attempt.start_time.strftime('%H:%M')}</td>
-                            <td><strong>{quiz_attempt.score:.1f}</strong></td>
-                        </tr>
-                    """
-
-                attempts_table += "</tbody></table>"
-
-                encouragement = "<p>Keep up the great work! Your dedication to learning is truly commendable. 🌟</p>"
-
-                html_content = (
-                    greeting + period + stats_section + attempts_table + encouragement
-                )
-
-                # Plain text fallback
-                text_content = f"Dear {user.username},\n\nHere is your monthly report for the period {today.strftime('%Y-%m-%d')} - {last_month_first_day.strftime('%Y-%m-%d')}\n\n"
-                text_content += f"Total Quiz Attempts: {len(quiz_attempts)}\n"
-                text_content += f"Total Score: {total_score:.1f}\n"
-                text_content += f"Average Score: {avg_score:.1f}\n"
-                text_content += f"Highest Score: {max_score:.1f}\n\n"
-                for quiz_attempt in quiz_attempts:
-                    text_content += f"Quiz Title: {quiz_attempt.quiz.title}\nQuiz Date: {quiz_attempt.start_time.strftime('%Y-%m-%d %H:%M:%S')}\nScore: {quiz_attempt.score:.1f}\n\n"
-
-            # Generate HTML email
-            html_body = create_email_template(
-                title=f"Monthly Performance Report - {last_month_first_day.strftime('%B %Y')}",
-                content=html_content,
-                footer_text="This is your automated monthly report from Quiz Master. Keep learning and growing! 🚀📈",
-            )
-
-            send_email(
-                f"📊 Monthly Report - {last_month_first_day.strftime('%B %Y')}",
-                [user.email],
-                text_content,
-                html_body,
-            )
-
-        return {
-            "status": "success",
-            "users_checked": len(active_users),
-            "completed_at": datetime.now(timezone.utc).isoformat(),
-        }
+        return fan_out(
+            MONTHLY_REPORT,
+            monthly_report_period(last_month_first_day),
+            send_report_chunk,
+            last_month_first_day.isoformat(),
+            today.isoformat(),
+        )
 
     except Exception as exc:
-        import traceback
-
-        traceback.print_exc()
         print(f"Monthly reports task failed: {str(exc)}")
-        # Retry with exponential backoff
         raise self.retry(exc=exc, countdown=300, max_retries=2)
+
+
+@celery_app.task(bind=True, name="app.tasks.periodic.send_report_chunk", max_retries=2)
+def send_report_chunk(self, user_ids, period_start, period_end, sent=0):
+    """Send the monthly report of the period (ISO datetimes) to a chunk of users."""
+    token = period = None
+    try:
+        last_month_first_day = datetime.fromisoformat(period_start)
+        today = datetime.fromisoformat(period_end)
+        period = monthly_report_period(last_month_first_day)
+        token, users = _claim_users(MONTHLY_REPORT, period, user_ids, User)
+        messages = list(monthly_report_messages(users, last_month_first_day, today))
+    except Exception as exc:
+        print(f"Report chunk failed before sending: {str(exc)}")
+        return fail_chunk(
+            self, exc, MONTHLY_REPORT, period, token, user_ids, sent, countdown=300
+        )
+    return deliver_chunk(
+        self,
+        MONTHLY_REPORT,
+        period,
+        token,
+        users,
+        messages,
+        [period_start, period_end],
+        sent,
+    )
+
+
+@celery_app.task(bind=True, name="app.tasks.periodic.checkpoint_answer_buffers")
+def checkpoint_answer_buffers(self):
+    """Flush Redis-buffered answers of in-progress attempts to the database."""
+    if not write_behind_enabled():
+        return {"status": "skipped", "reason": "write-behind disabled"}
+
+    attempt_ids = get_dirty_attempt_ids()
+    if not attempt_ids:
+        return {"status": "success", "attempts_flushed": 0, "answers_flushed": 0}
+
+    open_ids = {
+        attempt_id
+        for (attempt_id,) in db.session.query(QuizAttempt.id).filter(
+            QuizAttempt.id.in_(attempt_ids), QuizAttempt.in_progress == True
+        )
+    }
+
+    flushed_attempts = 0
+    flushed_answers = 0
+    failed = 0
+    for attempt_id in attempt_ids:
+        if attempt_id not in open_ids:
+            # Submitted (and flushed) or deleted attempts cannot take answers
+            discard_answers(attempt_id)
+            continue
+        try:
+            flushed_answers += flush_buffered_answers(attempt_id)
+            flushed_attempts += 1
+        except Exception as exc:
+            failed += 1
+            print(f"Failed to flush answers of attempt {attempt_id}: {str(exc)}")
+
+    print(
+        f"Answer checkpoint flushed {flushed_answers} answers "
+        f"across {flushed_attempts} attempts ({failed} failed)"
+    )
+    return {
+        "status": "success",
+        "attempts_flushed": flushed_attempts,
+        "answers_flushed": flushed_answers,
+        "attempts_failed": failed,
+        "completed_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@celery_app.task(bind=True, name="app.tasks.periodic.prewarm_quiz_caches")
+def prewarm_quiz_caches(self):
+    """
+    Load the caches of quizzes that are about to start so the first students
+    to open them are served from cache instead of all hitting the database.
+    """
+    now = datetime.now(timezone.utc)
+    lookahead = timedelta(minutes=current_app.config["QUIZ_PREWARM_LOOKAHEAD_MINUTES"])
+    upcoming = Quiz.query.filter(
+        Quiz.quiz_date >= now, Quiz.quiz_date <= now + lookahead
+    ).all()
+
+    warmed = []
+    for quiz in upcoming:
+        try:
+            # Question payload (with quiz, chapter and subject metadata)
+            payload = get_quiz_payload(quiz.id, refresh=True)
+            answer_key = get_answer_key(quiz.id, refresh=True)
+            if redis_leaderboard_enabled():
+                rebuild_quiz_leaderboard(quiz.id)
+            rebuild_score_histogram(quiz.id)
+            warmed.append(quiz.id)
+            print(
+                f"Pre-warmed quiz {quiz.id} starting at {quiz.quiz_date.isoformat()}: "
+                f"{len(answer_key['questions'])} questions, "
+                f"{len(payload['body'])} byte payload"
+            )
+        except Exception as exc:
+            print(f"Failed to pre-warm quiz {quiz.id}: {str(exc)}")
+
+    print(f"Quiz cache pre-warm: {len(warmed)}/{len(upcoming)} upcoming quizzes")
+    return {
+        "status": "success",
+        "quizzes_found": len(upcoming),
+        "quizzes_warmed": warmed,
+        "completed_at": datetime.now(timezone.utc).isoformat(),
+    }
@@ -1,7 +1,22 @@
-from flask_mail import Message
+import re
+import smtplib
+import time
+from collections import deque
+from flask import current_app, render_template
+from flask_mail import BadHeaderError, Message
+from markupsafe import Markup, escape
 from app import mail
 
 
+def build_message(
+    subject, recipients, body, html_body=None, sender="noreply@quizmaster.com"
+):
+    """Message for send_email_batch, same arguments as send_email"""
+    return Message(
+        subject=subject, recipients=recipients, body=body, html=html_body, sender=sender
+    )
+
+
 def send_email(
     subject, recipients, body, html_body=None, sender="noreply@quizmaster.com"
 ):
@@ -15,10 +30,109 @@ def send_email(
         html_body: Optional HTML body for rich formatting
         sender: Sender email address
     """
-    msg = Message(
-        subject=subject, recipients=recipients, body=body, html=html_body, sender=sender
-    )
-    mail.send(msg)
+    mail.send(build_message(subject, recipients, body, html_body, sender))
+
+
+# Rejected by the server for this message only; the connection is still usable
+_MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+    BadHeaderError,
+)
+# The connection is gone or could not be opened
+_CONNECTION_ERRORS = (smtplib.SMTPException, OSError)
+
+
+def _batches(messages, batch_size):
+    batch = []
+    for message in messages:
+        batch.append(message)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def send_email_batch(messages, batch_size=None, max_reconnects=None, on_batch=None):
+    """
+    Send many messages, holding one SMTP connection per batch of batch_size
+    (MAIL_BATCH_SIZE) messages instead of connecting for each one
+
+    Args:
+        messages: Iterable of Message objects, e.g. from build_message; it
+            is consumed one batch at a time
+        batch_size: Messages per connection
+        max_reconnects: Times a dropped connection is reopened within a batch
+            (MAIL_MAX_RECONNECTS); the message being sent is retried on the
+            new connection
+        on_batch: Optional callback run after each batch with the messages
+            sent and the failures of the batch, e.g. to checkpoint progress
+
+    Returns:
+        {"sent", "failed", "batches"}: failed lists the recipients and error
+        of every message that was not sent; batches holds the sent and failed
+        counts, duration and messages per second of each batch
+    """
+    config = current_app.config
+    batch_size = batch_size or config["MAIL_BATCH_SIZE"]
+    if max_reconnects is None:
+        max_reconnects = config["MAIL_MAX_RECONNECTS"]
+
+    sent = 0
+    failed = []
+    batches = []
+    for number, batch in enumerate(_batches(messages, batch_size), 1):
+        started = time.perf_counter()
+        pending = deque(batch)
+        delivered = []
+        failures = []
+        reconnects = 0
+        while pending:
+            try:
+                with mail.connect() as connection:
+                    while pending:
+                        message = pending[0]
+                        try:
+                            connection.send(message)
+                            delivered.append(message)
+                        except _MESSAGE_ERRORS as e:
+                            failures.append(
+                                {"recipients": message.recipients, "error": str(e)}
+                            )
+                        pending.popleft()
+            except _CONNECTION_ERRORS as e:
+                reconnects += 1
+                if reconnects > max_reconnects:
+                    print(f"Mail batch {number}: giving up after {str(e)}")
+                    failures.extend(
+                        {"recipients": message.recipients, "error": str(e)}
+                        for message in pending
+                    )
+                    pending.clear()
+                else:
+                    print(f"Mail batch {number}: reconnecting after {str(e)}")
+
+        elapsed = time.perf_counter() - started
+        rate = len(delivered) / elapsed if elapsed else 0.0
+        print(
+            f"Mail batch {number}: {len(delivered)} sent, {len(failures)} failed "
+            f"in {elapsed:.2f}s ({rate:.1f} msg/s)"
+        )
+        batches.append(
+            {
+                "sent": len(delivered),
+                "failed": len(failures),
+                "seconds": round(elapsed, 3),
+                "per_second": round(rate, 1),
+            }
+        )
+        sent += len(delivered)
+        failed.extend(failures)
+        if on_batch is not None:
+            on_batch(delivered, failures)
+    return {"sent": sent, "failed": failed, "batches": batches}
 
 
 def create_email_template(title, content, footer_text=""):
@@ -33,140 +147,50 @@ def create_email_template(title, content, footer_text=""):
     Returns:
         HTML string for email body
     """
-    return f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{title}</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                margin: 0;
-                padding: 0;
-                background-color: #f4f4f4;
-            }}
-            .container {{
-                max-width: 600px;
-                margin: 20px auto;
-                background-color: #ffffff;
-                border-radius: 8px;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                overflow: hidden;
-            }}
-            .header {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 30px 20px;
-                text-align: center;
-            }}
-            .header h1 {{
-                margin: 0;
-                font-size: 24px;
-                font-weight: 300;
-            }}
-            .content {{
-                padding: 30px 20px;
-            }}
-            .quiz-table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin: 20px 0;
-                background-color: #ffffff;
-                box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-                border-radius: 6px;
-                overflow: hidden;
-            }}
-            .quiz-table th {{
-                background-color: #f8f9fa;
-                color: #495057;
-                font-weight: 600;
-                padding: 15px 12px;
-                text-align: left;
-                border-bottom: 2px solid #dee2e6;
-            }}
-            .quiz-table td {{
-                padding: 12px;
-                border-bottom: 1px solid #e9ecef;
-            }}
-            .quiz-table tr:last-child td {{
-                border-bottom: none;
-            }}
-            .quiz-table tr:nth-child(even) {{
-                background-color: #f8f9fa;
-            }}
-            .stats-container {{
-                display: flex;
-                gap: 15px;
-                margin: 20px 0;
-                flex-wrap: wrap;
-            }}
-            .stat-box {{
-                flex: 1;
-                min-width: 120px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 20px;
-                border-radius: 6px;
-                text-align: center;
-            }}
-            .stat-number {{
-                font-size: 24px;
-                font-weight: bold;
-                margin-bottom: 5px;
-            }}
-            .stat-label {{
-                font-size: 12px;
-                opacity: 0.9;
-            }}
-            .footer {{
-                background-color: #f8f9fa;
-                padding: 20px;
-                text-align: center;
-                color: #6c757d;
-                font-size: 14px;
-            }}
-            .no-content {{
-                text-align: center;
-                padding: 40px 20px;
-                color: #6c757d;
-                font-style: italic;
-            }}
-            .greeting {{
-                font-size: 16px;
-                margin-bottom: 20px;
-                color: #495057;
-            }}
-            @media (max-width: 600px) {{
-                .container {{
-                    margin: 10px;
-                    border-radius: 0;
-                }}
-                .stats-container {{
-                    flex-direction: column;
-                }}
-                .quiz-table {{
-                    font-size: 14px;
-                }}
-                .quiz-table th, .quiz-table td {{
-                    padding: 8px;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🎓 {title}</h1>
-            </div>
-            <div class="content">
-                {content}
-            </div>
-            {f'<div class="footer">{footer_text}</div>' if footer_text else ''}
-        </div>
-    </body>
-    </html>
+    return render_template(
+        "email/base.html",
+        title=title,
+        content=Markup(content),
+        footer_text=footer_text,
+    )
+
+
+# Per-recipient slots are rendered as NUL-delimited markers and split out
+_SLOT_PATTERN = re.compile(r"\x00(\w+)\x00")
+
+
+def prerender_template(template_name, slots, **context):
+    """
+    Render a template once for a whole mailing, leaving the per-recipient
+    variables named in slots open
+
+    Args:
+        template_name: Template under app/templates, e.g. "email/daily_reminder.html"
+        slots: Names of the variables that differ per recipient; the template
+            must output them as-is (no filters)
+        context: Variables shared by every recipient
+
+    Returns:
+        Function taking the slot values as keywords and returning the
+        rendered string. It only escapes the values and joins strings, so its
+        cost does not depend on the size of the template.
     """
+    html = current_app.select_jinja_autoescape(template_name)
+    # Markup keeps autoescaping from touching the markers
+    markers = {name: Markup(f"\x00{name}\x00") for name in slots}
+    parts = _SLOT_PATTERN.split(render_template(template_name, **context, **markers))
+    # parts alternates literal text and slot names: text, name, text, ...
+    literals, names = parts[0::2], parts[1::2]
+    for name in names:
+        if name not in markers:
+            raise ValueError(f"Unknown slot {name} in {template_name}")
+
+    def fill(**values):
+        out = [literals[0]]
+        for name, literal in zip(names, literals[1:]):
+            value = values[name]
+            out.append(str(escape(value)) if html else str(value))
+            out.append(literal)
+        return "".join(out)
+
+    return fill
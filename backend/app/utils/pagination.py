@@ -0,0 +1,73 @@
+import base64
+import json
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    """Opaque cursor for the sort key values of the last row of a page."""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _cursor_serializer():
+    return URLSafeSerializer(current_app.config["SECRET_KEY"], salt="cursor")
+
+
+def encode_signed_cursor(values):
+    """Cursor for values the server has to trust, such as ranks."""
+    return _cursor_serializer().dumps(values)
+
+
+def decode_signed_cursor(cursor):
+    try:
+        return _cursor_serializer().loads(cursor)
+    except BadSignature:
+        raise ValueError("Invalid cursor")
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, maximum)
+
+
+def parse_offset(value):
+    if value in (None, ""):
+        return 0
+    try:
+        offset = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("offset must be an integer")
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    return offset
+
+
+def decode_offset_cursor(cursor):
+    """Offset carried by a cursor of a rank-ordered (Redis) listing."""
+    try:
+        (offset,) = decode_cursor(cursor)
+        offset = int(offset)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
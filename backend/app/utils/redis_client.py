@@ -0,0 +1,44 @@
+import redis
+from flask import current_app
+
+
+def get_redis():
+    """
+    Return a Redis client for the app's REDIS_URL (the same instance used by
+    flask_caching, Celery and flask_sse). One client is kept per app.
+    """
+    client = current_app.extensions.get("redis_client")
+    if client is None:
+        client = redis.Redis.from_url(
+            current_app.config["REDIS_URL"], decode_responses=True
+        )
+        current_app.extensions["redis_client"] = client
+    return client
+
+
+# Rebuilds retried this many times before writing without the WATCH
+REBUILD_ATTEMPTS = 5
+
+
+def rebuild_when_unchanged(watch_keys, load, write, attempts=REBUILD_ATTEMPTS):
+    """
+    Load data from the database with load() and store it with
+    write(pipeline, loaded) in a MULTI transaction that is dropped and
+    retried when one of watch_keys changes in between, e.g. when a submit is
+    recorded while a rebuild reads the database. The last attempt writes
+    without watching so a busy key cannot stall the rebuild.
+    Returns what load() returned.
+    """
+    with get_redis().pipeline() as pipe:
+        for attempt in range(attempts):
+            try:
+                if attempt < attempts - 1:
+                    pipe.watch(*watch_keys)
+                loaded = load()
+                pipe.multi()
+                write(pipe, loaded)
+                pipe.execute()
+                return loaded
+            except redis.WatchError:
+                print(f"Rebuild of {watch_keys[0]} raced a write, retrying")
+                continue
@@ -0,0 +1,83 @@
+"""
+Backfill the summary columns of completed quiz attempts.
+
+Fills total_questions, max_marks, attempted/correct/wrong counts and
+duration_seconds for completed attempts that were submitted before the
+columns existed. Counts are graded against the current answer key of the quiz.
+
+python scripts/backfill_attempt_summaries.py [--batch-size 500]
+"""
+
+import os
+import sys
+import argparse
+from collections import defaultdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app, db
+from app.models import QuizAttempt, UserResponse
+from app.services.catalog import get_answer_key
+from app.services.catalog.answer_key_service import grade_responses
+from app.services.user.quiz_service import elapsed_seconds
+
+
+def backfill(batch_size):
+    updated = 0
+    last_id = 0
+    while True:
+        attempts = (
+            QuizAttempt.query.filter(
+                QuizAttempt.in_progress == False,
+                QuizAttempt.total_questions.is_(None),
+                QuizAttempt.id > last_id,
+            )
+            .order_by(QuizAttempt.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not attempts:
+            break
+
+        responses = defaultdict(list)
+        for attempt_id, question_id, option_id, is_attempted in db.session.query(
+            UserResponse.attempt_id,
+            UserResponse.question_id,
+            UserResponse.option_id,
+            UserResponse.is_attempted,
+        ).filter(UserResponse.attempt_id.in_([a.id for a in attempts])):
+            responses[attempt_id].append((question_id, option_id, is_attempted))
+
+        for attempt in attempts:
+            summary = grade_responses(
+                get_answer_key(attempt.quiz_id), responses[attempt.id]
+            )
+            # Keep the score recorded at submit time
+            summary.pop("score")
+            for column, value in summary.items():
+                setattr(attempt, column, value)
+            attempt.duration_seconds = elapsed_seconds(
+                attempt.start_time, attempt.end_time
+            )
+
+        db.session.commit()
+        updated += len(attempts)
+        last_id = attempts[-1].id
+        print(f"Backfilled {updated} attempts")
+
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill quiz attempt summaries")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        total = backfill(args.batch_size)
+        print(f"Done: {total} attempts backfilled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Microbenchmark for the admin quiz summary.
+
+Seeds an in-memory SQLite database with a growing number of quizzes, each with
+a few questions and completed attempts, and reports the number of SQL
+statements and the latency of get_all_quiz_summary next to the old per-quiz
+implementation. Attempts are inserted directly, so quiz_stats is rebuilt from
+them before measuring. The two results are compared field by field.
+
+python scripts/bench_quiz_summary.py --quizzes 10 100 500 --attempts 20
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, func, desc
+from app import create_app, db
+from app.config import Config
+from app.models import User, Subject, Chapter, Quiz, Question, QuizAttempt
+from app.services.admin.quiz_admin_service import get_all_quiz_summary
+from app.services.catalog.quiz_stats_service import rebuild_quiz_stats
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    CACHE_TYPE = "SimpleCache"
+
+
+class QueryCounter:
+    """Count statements sent to the database inside a with block."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def seed_users(count):
+    users = [
+        User(f"bench_{i}", "benchmark", f"bench_{i}@quizmaster.com", f"Bench {i}")
+        for i in range(count)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def seed_quizzes(count, users, questions=5):
+    """Add quizzes until there are count of them, with one attempt per user."""
+    subject = Subject.query.filter_by(name="Bench subject").first()
+    if subject is None:
+        subject = Subject(name="Bench subject")
+        db.session.add(subject)
+        db.session.flush()
+        db.session.add(Chapter(subject_id=subject.id, name="Bench chapter"))
+        db.session.flush()
+    chapter = Chapter.query.filter_by(subject_id=subject.id).first()
+
+    started = datetime(2026, 1, 1, 9, 0)
+    # The Quiz model rejects past dates outside of demo mode
+    first_quiz_date = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    for n in range(Quiz.query.count(), count):
+        quiz = Quiz(
+            title=f"Bench quiz {n}",
+            chapter_id=chapter.id,
+            quiz_date=first_quiz_date + timedelta(days=n),
+            time_duration=30,
+        )
+        db.session.add(quiz)
+        db.session.flush()
+        db.session.add_all(
+            Question(quiz_id=quiz.id, question=f"Question {i}", max_marks=2.0)
+            for i in range(questions)
+        )
+        for i, user in enumerate(users):
+            duration = 60 + (n * 7 + i * 13) % 900
+            db.session.add(
+                QuizAttempt(
+                    user_id=user.id,
+                    quiz_id=quiz.id,
+                    start_time=started,
+                    end_time=started + timedelta(seconds=duration),
+                    duration_seconds=float(duration),
+                    in_progress=False,
+                    score=float((n + i * 3) % (questions * 2 + 1)),
+                )
+            )
+    db.session.commit()
+
+
+def legacy_get_all_quiz_summary():
+    """Per-quiz implementation used before the grouped queries, for comparison."""
+    quizzes = (
+        db.session.query(Quiz, Chapter, Subject)
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+        .all()
+    )
+    quiz_summaries = []
+    for quiz, chapter, subject in quizzes:
+        question_stats = (
+            db.session.query(
+                func.count(Question.id).label("total_questions"),
+                func.sum(Question.max_marks).label("total_marks"),
+            )
+            .filter(Question.quiz_id == quiz.id)
+            .first()
+        )
+        attempt_stats = (
+            db.session.query(
+                func.count(QuizAttempt.id).label("total_attempts"),
+                func.max(QuizAttempt.score).label("max_score"),
+                func.min(QuizAttempt.score).label("min_score"),
+                func.avg(QuizAttempt.score).label("avg_score"),
+            )
+            .filter(QuizAttempt.quiz_id == quiz.id, QuizAttempt.in_progress == False)
+            .first()
+        )
+        attempts_with_times = (
+            db.session.query(QuizAttempt.start_time, QuizAttempt.end_time)
+            .filter(
+                QuizAttempt.quiz_id == quiz.id,
+                QuizAttempt.in_progress == False,
+                QuizAttempt.end_time.isnot(None),
+            )
+            .all()
+        )
+        total_time_minutes = 0
+        valid_attempts = 0
+        for start_time, end_time in attempts_with_times:
+            if start_time and end_time:
+                total_time_minutes += (end_time - start_time).total_seconds() / 60
+                valid_attempts += 1
+        top_performer = (
+            db.session.query(User.id, User.full_name, QuizAttempt.score)
+            .join(QuizAttempt, User.id == QuizAttempt.user_id)
+            .filter(QuizAttempt.quiz_id == quiz.id, QuizAttempt.in_progress == False)
+            .order_by(desc(QuizAttempt.score))
+            .first()
+        )
+        quiz_summaries.append(
+            {
+                "quiz_id": quiz.id,
+                "total_marks": float(question_stats.total_marks or 0),
+                "total_questions": question_stats.total_questions or 0,
+                "total_attempts": attempt_stats.total_attempts or 0,
+                "Max_score": float(attempt_stats.max_score or 0),
+                "Min_score": float(attempt_stats.min_score or 0),
+                "Avg_score": float(attempt_stats.avg_score or 0),
+                "Total_time_spent": total_time_minutes,
+                "Avg_time_spent": (
+                    total_time_minutes / valid_attempts if valid_attempts else 0
+                ),
+                "top_score": float(top_performer.score) if top_performer else None,
+            }
+        )
+    return quiz_summaries
+
+
+def same_summaries(legacy, current):
+    current = {summary["quiz_id"]: summary for summary in current}
+    for old in legacy:
+        new = current[old.pop("quiz_id")]
+        top_score = old.pop("top_score")
+        if top_score != (new["top_performer"] or {}).get("score"):
+            return False
+        for field, value in old.items():
+            if abs(value - new[field]) > 1e-6:
+                return False
+    return True
+
+
+def measure(summary_fn):
+    db.session.expire_all()
+    with QueryCounter(db.engine) as counter:
+        started = time.perf_counter()
+        result = summary_fn()
+        elapsed = time.perf_counter() - started
+    return counter.count, elapsed * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the admin quiz summary")
+    parser.add_argument("--quizzes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--attempts", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        users = seed_users(args.attempts)
+
+        print(f"{'quizzes':>8} {'impl':>8} {'queries':>8} {'ms':>10} {'same':>6}")
+        for count in sorted(args.quizzes):
+            seed_quizzes(count, users)
+            rebuild_quiz_stats()
+            legacy_queries, legacy_ms, legacy = measure(legacy_get_all_quiz_summary)
+            queries, ms, current = measure(get_all_quiz_summary)
+            same = same_summaries(legacy, current)
+            print(f"{count:>8} {'legacy':>8} {legacy_queries:>8} {legacy_ms:>10.2f}")
+            print(f"{count:>8} {'current':>8} {queries:>8} {ms:>10.2f} {str(same):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Microbenchmark for rendering the daily reminder emails.
+
+Renders the reminder for a growing number of recipients three ways, without
+sending anything:
+
+    legacy      per-user string concatenation and f-string shell, as before
+    jinja       the Jinja2 templates rendered in full for every recipient
+    prerender   the templates rendered once, only the greeting filled per user
+
+and reports the total time and the cost per recipient of each.
+
+python scripts/bench_reminder_render.py --users 1000 10000 100000 --quizzes 5
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import render_template
+from app import create_app
+from app.config import Config
+from app.tasks.periodic import render_daily_reminder
+
+QuizRow = namedtuple("QuizRow", "title time_duration quiz_date chapter_name")
+UserRow = namedtuple("UserRow", "username email")
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    CACHE_TYPE = "SimpleCache"
+
+
+def legacy_email_template(title, content, footer_text=""):
+    """Shell of the emails before the Jinja templates, for comparison."""
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{title}</title>
+        <style>
+            body {{
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                line-height: 1.6;
+                color: #333;
+                margin: 0;
+                padding: 0;
+                background-color: #f4f4f4;
+            }}
+            .container {{
+                max-width: 600px;
+                margin: 20px auto;
+                background-color: #ffffff;
+                border-radius: 8px;
+                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+                overflow: hidden;
+            }}
+            .header {{
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 30px 20px;
+                text-align: center;
+            }}
+            .header h1 {{
+                margin: 0;
+                font-size: 24px;
+                font-weight: 300;
+            }}
+            .content {{
+                padding: 30px 20px;
+            }}
+            .quiz-table {{
+                width: 100%;
+                border-collapse: collapse;
+                margin: 20px 0;
+                background-color: #ffffff;
+                box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+                border-radius: 6px;
+                overflow: hidden;
+            }}
+            .quiz-table th {{
+                background-color: #f8f9fa;
+                color: #495057;
+                font-weight: 600;
+                padding: 15px 12px;
+                text-align: left;
+                border-bottom: 2px solid #dee2e6;
+            }}
+            .quiz-table td {{
+                padding: 12px;
+                border-bottom: 1px solid #e9ecef;
+            }}
+            .quiz-table tr:last-child td {{
+                border-bottom: none;
+            }}
+            .quiz-table tr:nth-child(even) {{
+                background-color: #f8f9fa;
+            }}
+            .stats-container {{
+                display: flex;
+                gap: 15px;
+                margin: 20px 0;
+                flex-wrap: wrap;
+            }}
+            .stat-box {{
+                flex: 1;
+                min-width: 120px;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 20px;
+                border-radius: 6px;
+                text-align: center;
+            }}
+            .stat-number {{
+                font-size: 24px;
+                font-weight: bold;
+                margin-bottom: 5px;
+            }}
+            .stat-label {{
+                font-size: 12px;
+                opacity: 0.9;
+            }}
+            .footer {{
+                background-color: #f8f9fa;
+                padding: 20px;
+                text-align: center;
+                color: #6c757d;
+                font-size: 14px;
+            }}
+            .no-content {{
+                text-align: center;
+                padding: 40px 20px;
+                color: #6c757d;
+                font-style: italic;
+            }}
+            .greeting {{
+                font-size: 16px;
+                margin-bottom: 20px;
+                color: #495057;
+            }}
+            @media (max-width: 600px) {{
+                .container {{
+                    margin: 10px;
+                    border-radius: 0;
+                }}
+                .stats-container {{
+                    flex-direction: column;
+                }}
+                .quiz-table {{
+                    font-size: 14px;
+                }}
+                .quiz-table th, .quiz-table td {{
+                    padding: 8px;
+                }}
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>🎓 {title}</h1>
+            </div>
+            <div class="content">
+                {content}
+            </div>
+            {f'<div class="footer">{footer_text}</div>' if footer_text else ''}
+        </div>
+    </body>
+    </html>
+    """
+
+
+def legacy_render(today, today_quizzes, user):
+    """Per-user build of send_daily_reminders before the templates."""
+    greeting = f'<div class="greeting">Dear <strong>{user.username}</strong>,</div>'
+    intro = f'<p>Here are the quizzes scheduled for today, <strong>{today.strftime("%B %d, %Y")}</strong>:</p>'
+    quiz_table = """
+    <table class="quiz-table">
+        <thead>
+            <tr>
+                <th>📚 Quiz Title</th>
+                <th>📖 Chapter</th>
+                <th>⏱️ Duration</th>
+                <th>🕐 Time</th>
+            </tr>
+        </thead>
+        <tbody>
+    """
+    for quiz in today_quizzes:
+        quiz_table += f"""
+            <tr>
+                <td><strong>{quiz.title}</strong></td>
+                <td>{quiz.chapter_name}</td>
+                <td>{quiz.time_duration} minutes</td>
+                <td>{quiz.quiz_date.strftime('%H:%M')}</td>
+            </tr>
+        """
+    quiz_table += "</tbody></table>"
+    stats_section = f"""
+    <div class="stats-container">
+        <div class="stat-box">
+            <div class="stat-number">{len(today_quizzes)}</div>
+            <div class="stat-label">QUIZZES TODAY</div>
+        </div>
+        <div class="stat-box">
+            <div class="stat-number">{sum(q.time_duration for q in today_quizzes)}</div>
+            <div class="stat-label">TOTAL MINUTES</div>
+        </div>
+    </div>
+    """
+    closing = "<p>Good luck with your quizzes! 🎯</p>"
+    html_content = greeting + intro + quiz_table + stats_section + closing
+    text_content = f"Dear {user.username},\n\nHere are the quizzes for today {today.strftime('%Y-%m-%d')}\n\n"
+    for quiz in today_quizzes:
+        text_content += f"Title: {quiz.title}\nChapter: {quiz.chapter_name}\nTime Duration: {quiz.time_duration} mins\nQuiz Date: {quiz.quiz_date.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    html_body = legacy_email_template(
+        title=f"Today's Quizzes - {today.strftime('%B %d, %Y')}",
+        content=html_content,
+        footer_text="This is an automated reminder from Quiz Master. Stay focused and do your best! 📚✨",
+    )
+    return text_content, html_body
+
+
+def run_legacy(today, quizzes, users):
+    for user in users:
+        legacy_render(today, quizzes, user)
+
+
+def run_jinja(today, quizzes, users):
+    date = today.strftime("%B %d, %Y")
+    for user in users:
+        render_template(
+            "email/daily_reminder.html",
+            title=f"Today's Quizzes - {date}",
+            footer_text="This is an automated reminder from Quiz Master.",
+            today=today,
+            quizzes=quizzes,
+            username=user.username,
+        )
+        render_template(
+            "email/daily_reminder.txt",
+            today=today,
+            quizzes=quizzes,
+            username=user.username,
+        )
+
+
+def run_prerender(today, quizzes, users):
+    _, html_body, text_body = render_daily_reminder(today, quizzes)
+    for user in users:
+        text_body(username=user.username)
+        html_body(username=user.username)
+
+
+IMPLEMENTATIONS = {
+    "legacy": run_legacy,
+    "jinja": run_jinja,
+    "prerender": run_prerender,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reminder rendering")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--quizzes", type=int, default=5)
+    args = parser.parse_args()
+
+    today = datetime.now(timezone.utc)
+    quizzes = [
+        QuizRow(
+            f"Bench quiz {n}",
+            30 + 5 * n,
+            today.replace(hour=9, minute=0) + timedelta(hours=n),
+            f"Chapter {n}",
+        )
+        for n in range(args.quizzes)
+    ]
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        print(f"{'users':>8} {'impl':>10} {'total ms':>10} {'us/user':>9}")
+        for count in sorted(args.users):
+            users = [
+                UserRow(f"bench_{i}", f"bench_{i}@quizmaster.com") for i in range(count)
+            ]
+            for name, run in IMPLEMENTATIONS.items():
+                started = time.perf_counter()
+                run(today, quizzes, users)
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{count:>8} {name:>10} {elapsed * 1000:>10.1f} "
+                    f"{elapsed / count * 1e6:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
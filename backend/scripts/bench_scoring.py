@@ -0,0 +1,204 @@
+"""
+Microbenchmark for close_quiz_attempt scoring.
+
+Seeds an in-memory SQLite database with one quiz per size, answers every
+question and reports the number of SQL statements and the latency of scoring,
+comparing the old per-response loop with close_quiz_attempt. The answer key is
+warmed first, as it is by the time students submit.
+
+Statements are reported in three columns: scoring and closing the attempt,
+the quiz_stats/user_stats rows updated in the same transaction, and the
+bookkeeping done after the commit (scope boards, result cache); "score ms"
+is the time until scoring ends and "total ms" the whole call. Redis is
+replaced by a client that ignores writes and the leaderboard uses the SQL
+backend, so no Redis server is needed and none of its latency is measured.
+
+python scripts/bench_scoring.py --sizes 10 100 1000
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import User, Subject, Chapter, Quiz, Question, Option, QuizAttempt
+from app.models import UserResponse
+from app.services.catalog import get_answer_key
+from app.services.user.quiz_service import close_quiz_attempt
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    CACHE_TYPE = "SimpleCache"
+    LEADERBOARD_BACKEND = "sql"
+    ANSWER_WRITE_BEHIND = False
+
+
+class NullRedis:
+    """Redis stand-in whose scripts do nothing, for the histogram/scope boards."""
+
+    def register_script(self, script):
+        return lambda keys=None, args=None: 0
+
+
+STATS_TABLES = ("quiz_stats", "user_stats")
+
+
+class QueryCounter:
+    """
+    Count statements sent to the database inside a with block. Statements
+    count as scoring until the first one touching a stats table, then as
+    stats until the commit, then as after-commit bookkeeping. The time at
+    which scoring ends is kept in scoring_end.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.scoring = 0
+        self.stats = 0
+        self.after_commit = 0
+        self.in_stats = False
+        self.committed = False
+        self.scoring_end = None
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        if self.committed:
+            self.after_commit += 1
+        elif self.in_stats or any(table in statement for table in STATS_TABLES):
+            if not self.in_stats:
+                self.in_stats = True
+                self.scoring_end = time.perf_counter()
+            self.stats += 1
+        else:
+            self.scoring += 1
+
+    def _on_commit(self, conn):
+        self.committed = True
+        if self.scoring_end is None:
+            self.scoring_end = time.perf_counter()
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        event.listen(self.engine, "commit", self._on_commit)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        event.remove(self.engine, "commit", self._on_commit)
+
+
+def seed_attempt(size, user):
+    subject = Subject(name=f"Bench subject {size} {user.username}")
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(subject_id=subject.id, name=f"Bench chapter {size}")
+    db.session.add(chapter)
+    db.session.flush()
+    quiz = Quiz(
+        title=f"Bench quiz {size}",
+        chapter_id=chapter.id,
+        quiz_date=datetime.now() + timedelta(days=1),
+        time_duration=60,
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    attempt = QuizAttempt(
+        user_id=user.id,
+        quiz_id=quiz.id,
+        start_time=datetime.now(timezone.utc),
+        in_progress=True,
+    )
+    db.session.add(attempt)
+    db.session.flush()
+
+    for i in range(size):
+        question = Question(quiz_id=quiz.id, question=f"Question {i}", max_marks=1.0)
+        db.session.add(question)
+        db.session.flush()
+        options = [
+            Option(
+                question_id=question.id, option_text=f"Option {j}", is_correct=j == 0
+            )
+            for j in range(4)
+        ]
+        db.session.add_all(options)
+        db.session.flush()
+        db.session.add(
+            UserResponse(
+                attempt_id=attempt.id,
+                question_id=question.id,
+                option_id=options[i % 4].id,
+                is_attempted=True,
+            )
+        )
+    db.session.commit()
+    return quiz
+
+
+def legacy_close_quiz_attempt(user_id, quiz_id):
+    """Scoring loop used before the set-based query, kept for comparison."""
+    attempt = QuizAttempt.query.filter_by(
+        user_id=user_id, quiz_id=quiz_id, in_progress=True
+    ).first()
+    attempt.in_progress = False
+    score = 0
+    for res in attempt.responses:
+        if res.option.is_correct:
+            score += res.question.max_marks
+    attempt.score = score
+    attempt.end_time = datetime.now(timezone.utc)
+    db.session.commit()
+    return attempt
+
+
+def measure(close_fn, user, quiz):
+    get_answer_key(quiz.id)
+    db.session.expire_all()
+    with QueryCounter(db.engine) as counter:
+        started = time.perf_counter()
+        close_fn(user.id, quiz.id)
+        elapsed = time.perf_counter() - started
+    scoring_ms = (counter.scoring_end - started) * 1000
+    score = QuizAttempt.query.filter_by(user_id=user.id, quiz_id=quiz.id).first().score
+    return counter, scoring_ms, elapsed * 1000, score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quiz attempt scoring")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        app.extensions["redis_client"] = NullRedis()
+        db.create_all()
+        legacy_user = User("bench_legacy", "benchmark", "legacy@quizmaster.com", "L")
+        current_user = User("bench_current", "benchmark", "current@quizmaster.com", "S")
+        db.session.add_all([legacy_user, current_user])
+        db.session.commit()
+
+        print(
+            f"{'questions':>10} {'impl':>8} {'scoring':>8} {'stats':>6} "
+            f"{'after':>6} {'score ms':>10} {'total ms':>10} {'score':>8}"
+        )
+        for size in args.sizes:
+            for name, user, close_fn in [
+                ("legacy", legacy_user, legacy_close_quiz_attempt),
+                ("current", current_user, close_quiz_attempt),
+            ]:
+                quiz = seed_attempt(size, user)
+                counter, scoring_ms, ms, score = measure(close_fn, user, quiz)
+                print(
+                    f"{size:>10} {name:>8} {counter.scoring:>8} {counter.stats:>6} "
+                    f"{counter.after_commit:>6} {scoring_ms:>10.2f} {ms:>10.2f} {score:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Rebuild aggregates that are maintained incrementally on submit.
+
+    leaderboards   Redis sorted-set leaderboards of every quiz
+    quiz-stats     quiz_stats rows behind the admin quiz summary
+    histograms     Redis score histograms of every quiz
+    scope-boards   Redis chapter and subject leaderboards
+    user-stats     user_stats rows behind the user performance summary
+
+python scripts/rebuild_aggregates.py <aggregate> [--quiz-id 12]
+
+With --quiz-id only the aggregates covering that quiz are rebuilt.
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from app.models import Quiz, Chapter
+from app.services.catalog.leaderboard_service import rebuild_quiz_leaderboard
+from app.services.catalog.quiz_stats_service import rebuild_quiz_stats
+from app.services.catalog.score_distribution_service import rebuild_score_histogram
+from app.services.catalog.scope_leaderboard_service import rebuild_scope_leaderboard
+from app.services.user.user_stats_service import rebuild_user_stats
+
+
+def _quiz_ids(quiz_id=None):
+    query = Quiz.query.with_entities(Quiz.id).order_by(Quiz.id)
+    if quiz_id is not None:
+        query = query.filter(Quiz.id == quiz_id)
+    return [row.id for row in query]
+
+
+def rebuild_leaderboards(quiz_id=None):
+    quiz_ids = _quiz_ids(quiz_id)
+    for qid in quiz_ids:
+        entries = rebuild_quiz_leaderboard(qid)
+        print(f"Quiz {qid}: {entries} leaderboard entries")
+    return len(quiz_ids), "quizzes"
+
+
+def rebuild_histograms(quiz_id=None):
+    quiz_ids = _quiz_ids(quiz_id)
+    for qid in quiz_ids:
+        attempts = rebuild_score_histogram(qid)
+        print(f"Quiz {qid}: {attempts} attempts in the score histogram")
+    return len(quiz_ids), "quizzes"
+
+
+def rebuild_stats(quiz_id=None):
+    quizzes = rebuild_quiz_stats(quiz_id)
+    print(f"Rebuilt quiz_stats of {quizzes} quizzes with completed attempts")
+    return quizzes, "quizzes"
+
+
+def rebuild_scope_boards(quiz_id=None):
+    chapters = Chapter.query.order_by(Chapter.id)
+    if quiz_id is not None:
+        chapters = chapters.join(Quiz, Quiz.chapter_id == Chapter.id).filter(
+            Quiz.id == quiz_id
+        )
+    chapters = chapters.all()
+    for chapter in chapters:
+        users = rebuild_scope_leaderboard("chapter", chapter.id)
+        print(f"Chapter {chapter.id}: {users} users")
+    subject_ids = sorted({chapter.subject_id for chapter in chapters})
+    for subject_id in subject_ids:
+        users = rebuild_scope_leaderboard("subject", subject_id)
+        print(f"Subject {subject_id}: {users} users")
+    return len(chapters) + len(subject_ids), "chapter and subject boards"
+
+
+def rebuild_users(quiz_id=None):
+    users = rebuild_user_stats(quiz_id=quiz_id)
+    print(f"Rebuilt stats of {users} users")
+    return users, "users"
+
+
+AGGREGATES = {
+    "leaderboards": rebuild_leaderboards,
+    "quiz-stats": rebuild_stats,
+    "histograms": rebuild_histograms,
+    "scope-boards": rebuild_scope_boards,
+    "user-stats": rebuild_users,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild incremental aggregates")
+    parser.add_argument("aggregate", choices=sorted(AGGREGATES))
+    parser.add_argument("--quiz-id", type=int, help="Only rebuild this quiz")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        total, unit = AGGREGATES[args.aggregate](args.quiz_id)
+        print(f"Done: rebuilt {args.aggregate} of {total} {unit}")
+
+
+if __name__ == "__main__":
+    main()